@@ -0,0 +1,23 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+_executor: ThreadPoolExecutor | None = None
+
+
+def configure_io_executor(max_workers: int | None) -> None:
+    global _executor
+    _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="kafka-io")
+
+
+def get_io_executor() -> ThreadPoolExecutor:
+    if _executor is None:
+        configure_io_executor(None)
+    return _executor
+
+
+async def run_blocking[**P, T](function: Callable[P, T], *args: P.args, **kwargs: P.kwargs) -> T:
+    return await asyncio.get_running_loop().run_in_executor(
+        get_io_executor(), functools.partial(function, *args, **kwargs)
+    )
@@ -0,0 +1,21 @@
+from .appender import LogAppender, get_log_appender
+from .checksum import CRC32C_IMPLEMENTATION, CrcCheckPolicy, crc32c
+from .compression import CompressionType, UnsupportedCompressionError, decompress
+from .file_records import (
+    BatchPosition,
+    CorruptRecordError,
+    FileRecords,
+    MemoryRecords,
+    Records,
+    read_mapped_records,
+    scan_batches,
+    scan_buffer_batches,
+    validate_batches,
+    verify_batch_crc,
+)
+from .log import LOG_DIR, Log, LogConfig, configure_logs, get_log, partition_directory
+from .offset_index import OffsetIndex
+from .recovery import recover_logs
+from .segment import LogSegment
+from .segment_maps import SegmentMaps, configure_segment_maps, get_segment_maps
+from .time_index import TimeIndex
@@ -0,0 +1,114 @@
+import asyncio
+import functools
+from dataclasses import dataclass
+
+from ..executor import run_blocking
+from .file_records import CorruptRecordError, validate_batches
+from .log import Log, get_log
+
+
+@dataclass(frozen=True)
+class PendingAppend:
+    records: bytes | memoryview
+    acks: int
+    future: asyncio.Future[int] | None
+
+    def set_result(self, base_offset: int) -> None:
+        if self.future is not None and not self.future.done():
+            self.future.set_result(base_offset)
+
+    def set_exception(self, exception: Exception) -> None:
+        if self.future is not None and not self.future.done():
+            self.future.set_exception(exception)
+
+
+class LogAppender:
+    def __init__(self, topic_name: str, partition_index: int) -> None:
+        self._topic_name = topic_name
+        self._partition_index = partition_index
+        self._pending: list[PendingAppend] = []
+        self._task: asyncio.Task[None] | None = None
+        self._append_waiters: set[asyncio.Future[None]] = set()
+
+    def submit(self, records: bytes | memoryview, acks: int) -> asyncio.Future[int] | None:
+        validate_batches(records)
+        future = None if acks == 0 else asyncio.get_running_loop().create_future()
+        self._pending.append(PendingAppend(records, acks, future))
+        if self._task is None:
+            self._task = asyncio.create_task(self._commit_pending())
+        return future
+
+    def wait_for_append(self) -> asyncio.Future[None]:
+        future = asyncio.get_running_loop().create_future()
+        self._append_waiters.add(future)
+        future.add_done_callback(self._append_waiters.discard)
+        return future
+
+    async def _commit_pending(self) -> None:
+        try:
+            try:
+                log = await run_blocking(get_log, self._topic_name, self._partition_index)
+            except OSError as e:
+                pending, self._pending = self._pending, []
+                for append in pending:
+                    append.set_exception(e)
+                return
+
+            while self._pending:
+                await asyncio.sleep(log.config.linger_ms / 1000)
+                pending, self._pending = self._pending, []
+                await self._commit(log, pending)
+        finally:
+            self._task = None
+
+    async def _commit(self, log: Log, pending: list[PendingAppend]) -> None:
+        if log.config.crc_check.verify_on_append:
+            errors = await run_blocking(_verify_checksums, [append.records for append in pending])
+            for append, error in zip(pending, errors):
+                if error is not None:
+                    append.set_exception(error)
+            pending = [append for append, error in zip(pending, errors) if error is None]
+            if not pending:
+                return
+
+        try:
+            base_offsets = await run_blocking(log.append, [append.records for append in pending])
+        except Exception as e:
+            for append in pending:
+                append.set_exception(e)
+            return
+
+        for waiter in list(self._append_waiters):
+            if not waiter.done():
+                waiter.set_result(None)
+
+        committed = list(zip(pending, base_offsets))
+        for append, base_offset in committed:
+            if append.acks != -1:
+                append.set_result(base_offset)
+
+        try:
+            await run_blocking(log.flush)
+        except OSError as e:
+            for append, _ in committed:
+                append.set_exception(e)
+            return
+        for append, base_offset in committed:
+            append.set_result(base_offset)
+
+
+def _verify_checksums(record_sets: list[bytes | memoryview]) -> list[CorruptRecordError | None]:
+    errors = []
+    for records in record_sets:
+        try:
+            validate_batches(records, verify_crc=True)
+        except CorruptRecordError as e:
+            errors.append(e)
+        else:
+            errors.append(None)
+    return errors
+
+
+@functools.cache
+def get_log_appender(topic_name: str, partition_index: int) -> LogAppender:
+    return LogAppender(topic_name, partition_index)
@@ -0,0 +1,103 @@
+import enum
+import functools
+
+try:
+    import crc32c as _crc32c
+except ImportError:
+    _crc32c = None
+
+try:
+    import google_crc32c as _google_crc32c
+except ImportError:
+    _google_crc32c = None
+
+if _google_crc32c is not None and _google_crc32c.implementation != "c":
+    _google_crc32c = None
+
+if _crc32c is not None:
+    CRC32C_IMPLEMENTATION = "crc32c"
+elif _google_crc32c is not None:
+    CRC32C_IMPLEMENTATION = "google-crc32c"
+else:
+    CRC32C_IMPLEMENTATION = "python"
+
+CASTAGNOLI_POLYNOMIAL = 0x11EDC6F41
+REFLECTED_CASTAGNOLI_POLYNOMIAL = 0x82F63B78
+TABLE_THRESHOLD_BYTES = 512
+
+
+class CrcCheckPolicy(enum.StrEnum):
+    OFF = "off"
+    APPEND = "append"
+    RECOVERY = "recovery"
+    ALL = "all"
+
+    @property
+    def verify_on_append(self) -> bool:
+        return self in (CrcCheckPolicy.APPEND, CrcCheckPolicy.ALL)
+
+    @property
+    def verify_on_recovery(self) -> bool:
+        return self in (CrcCheckPolicy.RECOVERY, CrcCheckPolicy.ALL)
+
+
+DEFAULT_CRC_CHECK_POLICY = CrcCheckPolicy.RECOVERY if CRC32C_IMPLEMENTATION == "python" else CrcCheckPolicy.APPEND
+
+
+def _table_entry(b: int) -> int:
+    for _ in range(8):
+        b = (b >> 1) ^ REFLECTED_CASTAGNOLI_POLYNOMIAL if b & 1 else b >> 1
+    return b
+
+
+_TABLE = [_table_entry(b) for b in range(256)]
+_REVERSED_BITS = bytes(int(f"{b:08b}"[::-1], 2) for b in range(256))
+
+
+def _crc32c_table(data: bytes | memoryview) -> int:
+    crc = 0xFFFFFFFF
+    for b in data:
+        crc = _TABLE[(crc ^ b) & 0xFF] ^ (crc >> 8)
+    return crc ^ 0xFFFFFFFF
+
+
+def _clmul(a: int, b: int) -> int:
+    product = 0
+    while b:
+        low_bit = b & -b
+        product ^= a << (low_bit.bit_length() - 1)
+        b ^= low_bit
+    return product
+
+
+def _reduce(n: int) -> int:
+    for i in range(n.bit_length() - 1, 31, -1):
+        if (n >> i) & 1:
+            n ^= CASTAGNOLI_POLYNOMIAL << (i - 32)
+    return n
+
+
+@functools.cache
+def _x_pow_mod(k: int) -> int:
+    if k < 32:
+        return 1 << k
+    n = _reduce(_clmul(_x_pow_mod(k // 2), _x_pow_mod(k // 2)))
+    return _reduce(n << 1) if k & 1 else n
+
+
+def _crc32c_fold(data: bytes | memoryview) -> int:
+    n = (int.from_bytes(bytes(data).translate(_REVERSED_BITS)) << 32) ^ (0xFFFFFFFF << len(data) * 8)
+    while (length := n.bit_length()) > 64:
+        k = 1 << (length - 1).bit_length() - 1
+        n = _clmul(n >> k, _x_pow_mod(k)) ^ (n & ((1 << k) - 1))
+    return int.from_bytes(_reduce(n).to_bytes(4, "little").translate(_REVERSED_BITS)) ^ 0xFFFFFFFF
+
+
+def crc32c(data: bytes | memoryview) -> int:
+    if _crc32c is not None:
+        return _crc32c.crc32c(data)
+    if _google_crc32c is not None:
+        return _google_crc32c.value(data)
+    if len(data) < TABLE_THRESHOLD_BYTES:
+        return _crc32c_table(data)
+    return _crc32c_fold(data)
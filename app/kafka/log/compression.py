@@ -0,0 +1,78 @@
+import enum
+import gzip
+from typing import Self
+
+try:
+    import snappy
+except ImportError:
+    snappy = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+ATTRIBUTES_POSITION = 21
+COMPRESSION_CODEC_MASK = 0x07
+XERIAL_SNAPPY_MAGIC = b"\x82SNAPPY\x00"
+XERIAL_SNAPPY_HEADER_SIZE = 16
+
+
+class UnsupportedCompressionError(Exception):
+    pass
+
+
+@enum.unique
+class CompressionType(enum.IntEnum):
+    NONE = 0
+    GZIP = 1
+    SNAPPY = 2
+    LZ4 = 3
+    ZSTD = 4
+
+    @classmethod
+    def from_attributes(cls, attributes: int) -> Self:
+        codec = attributes & COMPRESSION_CODEC_MASK
+        try:
+            return cls(codec)
+        except ValueError:
+            raise UnsupportedCompressionError(f"unknown compression codec {codec}") from None
+
+
+def decompress(compression_type: CompressionType, data: bytes | memoryview) -> bytes | memoryview:
+    match compression_type:
+        case CompressionType.NONE:
+            return data
+        case CompressionType.GZIP:
+            return gzip.decompress(data)
+        case CompressionType.SNAPPY:
+            if snappy is None:
+                raise UnsupportedCompressionError("snappy decompression requires the python-snappy package")
+            return _decompress_snappy(bytes(data))
+        case CompressionType.LZ4:
+            if lz4_frame is None:
+                raise UnsupportedCompressionError("lz4 decompression requires the lz4 package")
+            return lz4_frame.decompress(data)
+        case CompressionType.ZSTD:
+            if zstandard is None:
+                raise UnsupportedCompressionError("zstd decompression requires the zstandard package")
+            return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+
+
+def _decompress_snappy(data: bytes) -> bytes:
+    if not data.startswith(XERIAL_SNAPPY_MAGIC):
+        return snappy.decompress(data)
+
+    chunks = []
+    position = XERIAL_SNAPPY_HEADER_SIZE
+    while position < len(data):
+        size = int.from_bytes(data[position:position + 4])
+        position += 4
+        chunks.append(snappy.decompress(data[position:position + size]))
+        position += size
+    return b"".join(chunks)
@@ -0,0 +1,254 @@
+import asyncio
+import os
+import struct
+from asyncio import StreamWriter
+from dataclasses import dataclass, replace
+from typing import BinaryIO, Generator, Iterator, Self
+
+from ..protocol import ByteReader, decode_varint, decode_varlong
+from .checksum import crc32c
+from .compression import ATTRIBUTES_POSITION, CompressionType, UnsupportedCompressionError, decompress
+
+LOG_OVERHEAD = 12
+BATCH_HEADER_SIZE = 61
+MAGIC_POSITION = 16
+CRC_POSITION = 17
+MAGIC = 2
+TIMESTAMP_TYPE_LOG_APPEND_TIME = 0x08
+BATCH_HEADER = struct.Struct(">qi11xi8xq")
+BATCH_TIMESTAMPS = struct.Struct(">21xhi2q14xi")
+
+
+class CorruptRecordError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class BatchPosition:
+    position: int
+    base_offset: int
+    last_offset: int
+    size: int
+    max_timestamp: int = -1
+
+    @property
+    def end(self) -> int:
+        return self.position + self.size
+
+
+def _parse_batch_header(buffer: bytes | memoryview, position: int, start: int = 0) -> BatchPosition:
+    base_offset, batch_length, last_offset_delta, max_timestamp = BATCH_HEADER.unpack_from(buffer, start)
+    return BatchPosition(
+        position, base_offset, base_offset + last_offset_delta, LOG_OVERHEAD + batch_length, max_timestamp
+    )
+
+
+def _check_batch_header(buffer: bytes | memoryview, batch: BatchPosition, start: int = 0) -> None:
+    if batch.size < BATCH_HEADER_SIZE:
+        raise CorruptRecordError("record batch length out of range")
+    if (magic := buffer[start + MAGIC_POSITION]) != MAGIC:
+        raise CorruptRecordError(f"unsupported record batch magic {magic}")
+    if batch.last_offset < batch.base_offset:
+        raise CorruptRecordError("negative last offset delta")
+
+
+def scan_batches(reader: BinaryIO, position: int = 0, end: int | None = None) -> Generator[BatchPosition, None, None]:
+    fd = reader.fileno()
+    if end is None:
+        end = os.fstat(fd).st_size
+    while position + BATCH_HEADER_SIZE <= end:
+        header = os.pread(fd, BATCH_HEADER_SIZE, position)
+        batch = _parse_batch_header(header, position)
+        try:
+            _check_batch_header(header, batch)
+        except CorruptRecordError:
+            return
+        if batch.end > end:
+            return
+        yield batch
+        position = batch.end
+
+
+def scan_buffer_batches(
+    buffer: bytes | memoryview, position: int, end: int, buffer_position: int = 0
+) -> Generator[BatchPosition, None, None]:
+    while position + BATCH_HEADER_SIZE <= end:
+        batch = _parse_batch_header(buffer, position, position - buffer_position)
+        try:
+            _check_batch_header(buffer, batch, position - buffer_position)
+        except CorruptRecordError:
+            return
+        if batch.end > end:
+            return
+        yield batch
+        position = batch.end
+
+
+def verify_batch_crc(batch_data: bytes | memoryview) -> bool:
+    return crc32c(batch_data[ATTRIBUTES_POSITION:]) == int.from_bytes(batch_data[CRC_POSITION:ATTRIBUTES_POSITION])
+
+
+def find_timestamp_in_batch(batch_data: bytes | memoryview, timestamp: int) -> tuple[int, int]:
+    base_offset = int.from_bytes(batch_data[0:8], signed=True)
+    attributes, last_offset_delta, base_timestamp, max_timestamp, records_count = BATCH_TIMESTAMPS.unpack_from(
+        batch_data
+    )
+    if attributes & TIMESTAMP_TYPE_LOG_APPEND_TIME:
+        return max_timestamp, base_offset
+    try:
+        readable = ByteReader(decompress(CompressionType.from_attributes(attributes), batch_data[BATCH_HEADER_SIZE:]))
+    except UnsupportedCompressionError:
+        return max_timestamp, base_offset
+
+    for _ in range(records_count):
+        length = decode_varint(readable)
+        end = readable.tell() + length
+        readable.read(1)
+        record_timestamp = base_timestamp + decode_varlong(readable)
+        offset_delta = decode_varint(readable)
+        if record_timestamp >= timestamp:
+            return record_timestamp, base_offset + offset_delta
+        readable.read(end - readable.tell())
+    return max_timestamp, base_offset + last_offset_delta
+
+
+def validate_batches(records: bytes | memoryview, verify_crc: bool = False) -> list[BatchPosition]:
+    batches = []
+    position = 0
+    while position < len(records):
+        if position + BATCH_HEADER_SIZE > len(records):
+            raise CorruptRecordError("truncated record batch header")
+        batch = _parse_batch_header(records, position, position)
+        _check_batch_header(records, batch, position)
+        if batch.end > len(records):
+            raise CorruptRecordError("record batch length out of range")
+        attributes_position = position + ATTRIBUTES_POSITION
+        CompressionType.from_attributes(int.from_bytes(records[attributes_position:attributes_position + 2]))
+        if verify_crc and not verify_batch_crc(records[batch.position:batch.end]):
+            raise CorruptRecordError(f"record batch at offset {batch.base_offset} failed its crc check")
+        batches.append(batch)
+        position = batch.end
+    if not batches:
+        raise CorruptRecordError("empty record set")
+    return batches
+
+
+def _select_batches(
+    batches: Iterator[BatchPosition],
+    offset: int,
+    start_position: int,
+    end: int,
+    max_size: int | None,
+    min_one_batch: bool,
+) -> tuple[int, int]:
+    position = start_position
+    first_batch = None
+    for batch in batches:
+        position = batch.position
+        if batch.last_offset >= offset:
+            first_batch = batch
+            break
+        position = batch.end
+
+    if max_size is None:
+        return position, end
+    if first_batch is None or (first_batch.size > max_size and not min_one_batch):
+        return position, position
+    end = first_batch.end
+    for batch in batches:
+        if batch.end - position > max_size:
+            break
+        end = batch.end
+    return position, end
+
+
+@dataclass(frozen=True)
+class FileRecords:
+    path: str
+    position: int
+    size: int
+
+    def __len__(self) -> int:
+        return self.size
+
+    @classmethod
+    def from_offset(
+        cls, path: str, offset: int, start_position: int = 0, max_size: int | None = None, min_one_batch: bool = True
+    ) -> Self:
+        with open(path, mode="rb") as reader:
+            end = os.fstat(reader.fileno()).st_size
+            position, end = _select_batches(
+                scan_batches(reader, start_position), offset, start_position, end, max_size, min_one_batch
+            )
+        return cls(path, position, max(end - position, 0))
+
+    def iter_batches(self) -> Generator[tuple[BatchPosition, bytes], None, None]:
+        with open(self.path, mode="rb") as reader:
+            for batch in scan_batches(reader, self.position):
+                if batch.end > self.position + self.size:
+                    return
+                yield batch, os.pread(reader.fileno(), batch.size, batch.position)
+
+    def read(self) -> bytes:
+        with open(self.path, mode="rb") as reader:
+            return os.pread(reader.fileno(), self.size, self.position)
+
+    async def send(self, writer: StreamWriter) -> None:
+        await writer.drain()
+        with open(self.path, mode="rb") as file:
+            await asyncio.get_running_loop().sendfile(writer.transport, file, self.position, self.size)
+
+
+@dataclass(frozen=True)
+class MemoryRecords:
+    buffer: memoryview
+    position: int = 0
+
+    def __len__(self) -> int:
+        return len(self.buffer)
+
+    def iter_batches(self) -> Generator[tuple[BatchPosition, memoryview], None, None]:
+        for batch in scan_buffer_batches(self.buffer, 0, len(self.buffer)):
+            yield replace(batch, position=self.position + batch.position), self.buffer[batch.position:batch.end]
+
+    def read(self) -> bytes:
+        return bytes(self.buffer)
+
+    async def send(self, writer: StreamWriter) -> None:
+        writer.write(self.buffer)
+
+
+type Records = FileRecords | MemoryRecords
+
+
+def _scan_mapped_batches(
+    path: str, buffer: memoryview, position: int, end: int
+) -> Generator[BatchPosition, None, None]:
+    for batch in scan_buffer_batches(buffer, position, min(len(buffer), end)):
+        yield batch
+        position = batch.end
+    if position + BATCH_HEADER_SIZE <= end:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            tail = os.pread(fd, end - position, position)
+        finally:
+            os.close(fd)
+        yield from scan_buffer_batches(tail, position, position + len(tail), position)
+
+
+def read_mapped_records(
+    path: str,
+    buffer: memoryview,
+    size: int,
+    offset: int,
+    start_position: int = 0,
+    max_size: int | None = None,
+    min_one_batch: bool = True,
+) -> Records:
+    position, end = _select_batches(
+        _scan_mapped_batches(path, buffer, start_position, size), offset, start_position, size, max_size, min_one_batch
+    )
+    end = max(end, position)
+    if end <= len(buffer):
+        return MemoryRecords(buffer[position:end], position)
+    return FileRecords(path, position, end - position)
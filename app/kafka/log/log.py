@@ -0,0 +1,203 @@
+import bisect
+import contextlib
+import fcntl
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Generator
+
+from .checksum import DEFAULT_CRC_CHECK_POLICY, CrcCheckPolicy
+from .file_records import BatchPosition, Records, validate_batches
+from .offset_index import INDEX_INTERVAL_BYTES
+from .segment import LogSegment
+
+LOG_DIR = "/tmp/kraft-combined-logs"
+
+
+@dataclass(frozen=True)
+class LogConfig:
+    segment_bytes: int = 1024 * 1024 * 1024
+    segment_ms: int = 7 * 24 * 60 * 60 * 1000
+    index_interval_bytes: int = INDEX_INTERVAL_BYTES
+    linger_ms: int = 0
+    crc_check: CrcCheckPolicy = DEFAULT_CRC_CHECK_POLICY
+
+
+class Log:
+    def __init__(self, directory: str, config: LogConfig = LogConfig()) -> None:
+        self.directory = directory
+        self.config = config
+        self._lock = threading.RLock()
+        self._lock_fd: int | None = None
+        self._lock_pid = 0
+
+        os.makedirs(directory, exist_ok=True)
+        base_offsets = self._list_base_offsets()
+        self._base_offsets = base_offsets or [0]
+        self._segments = [
+            LogSegment(directory, base_offset, config.index_interval_bytes) for base_offset in base_offsets
+        ] or [LogSegment.create(directory, 0, config.index_interval_bytes)]
+
+    @property
+    def segments(self) -> list[LogSegment]:
+        return self._segments
+
+    @property
+    def active_segment(self) -> LogSegment:
+        return self._segments[-1]
+
+    @property
+    def log_start_offset(self) -> int:
+        return self._segments[0].base_offset
+
+    @property
+    def log_end_offset(self) -> int:
+        return self.active_segment.next_offset
+
+    def segment_for(self, offset: int) -> LogSegment:
+        i = bisect.bisect_right(self._base_offsets, offset) - 1
+        return self._segments[max(i, 0)]
+
+    def read(self, offset: int, max_size: int | None = None, min_one_batch: bool = True) -> Records:
+        with self._lock:
+            records = self._read(offset, max_size, min_one_batch)
+            if len(records) == 0 and self._refresh_segments():
+                records = self._read(offset, max_size, min_one_batch)
+            return records
+
+    def _read(self, offset: int, max_size: int | None, min_one_batch: bool) -> Records:
+        i = max(bisect.bisect_right(self._base_offsets, offset) - 1, 0)
+        records = self._segments[i].read(offset, max_size, min_one_batch)
+        while len(records) == 0 and i + 1 < len(self._segments) and self._segments[i].next_offset <= offset:
+            i += 1
+            records = self._segments[i].read(offset, max_size, min_one_batch)
+        return records
+
+    def refresh(self) -> None:
+        with self._lock:
+            self._refresh_segments()
+            self.active_segment.refresh()
+
+    def find_offset_by_timestamp(self, timestamp: int) -> tuple[int, int] | None:
+        with self._lock:
+            for segment in self._segments:
+                if (found := segment.find_offset_by_timestamp(timestamp)) is not None:
+                    return found
+            return None
+
+    def find_max_timestamp(self) -> tuple[int, int] | None:
+        with self._lock:
+            segment = max(self._segments, key=lambda segment: segment.max_timestamp)
+            if segment.max_timestamp < 0:
+                return None
+            return segment.find_offset_by_timestamp(segment.max_timestamp)
+
+    def recover(self) -> int:
+        with self._exclusive():
+            return self.active_segment.recover(self.config.crc_check.verify_on_recovery)
+
+    def append(self, record_sets: list[bytes | memoryview]) -> list[int]:
+        with self._exclusive():
+            self._refresh_segments()
+            return self._append(record_sets)
+
+    def _append(self, record_sets: list[bytes | memoryview]) -> list[int]:
+        self.active_segment.refresh()
+        offset = self.log_end_offset
+
+        buffer = bytearray()
+        batches: list[BatchPosition] = []
+        base_offsets: list[int] = []
+        for records in record_sets:
+            base_offsets.append(offset)
+            for batch in validate_batches(records):
+                position = len(buffer) + batch.position
+                last_offset = offset + batch.last_offset - batch.base_offset
+                batches.append(BatchPosition(position, offset, last_offset, batch.size, batch.max_timestamp))
+                offset = batches[-1].last_offset + 1
+            buffer += records
+
+        for batch in batches:
+            buffer[batch.position:batch.position + 8] = batch.base_offset.to_bytes(8, signed=True)
+        self.maybe_roll(len(buffer)).append(buffer, batches)
+        return base_offsets
+
+    def flush(self) -> None:
+        with self._exclusive():
+            segment = self.active_segment
+            segment.time_index.flush()
+            segment.index.flush()
+        segment.sync()
+
+    @contextlib.contextmanager
+    def _exclusive(self) -> Generator[None, None, None]:
+        with self._lock:
+            if self._lock_fd is None or self._lock_pid != os.getpid():
+                self._lock_fd = os.open(os.path.join(self.directory, ".lock"), os.O_RDWR | os.O_CREAT)
+                self._lock_pid = os.getpid()
+            fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def _list_base_offsets(self) -> list[int]:
+        return sorted(
+            int(file_name.removesuffix(".log"))
+            for file_name in os.listdir(self.directory)
+            if file_name.endswith(".log") and file_name.removesuffix(".log").isdigit()
+        )
+
+    def _refresh_segments(self) -> bool:
+        new_base_offsets = [
+            base_offset for base_offset in self._list_base_offsets() if base_offset > self._base_offsets[-1]
+        ]
+        if not new_base_offsets:
+            return False
+
+        self.active_segment.close()
+        for base_offset in new_base_offsets:
+            self._segments.append(LogSegment(self.directory, base_offset, self.config.index_interval_bytes))
+            self._base_offsets.append(base_offset)
+        return True
+
+    def maybe_roll(self, incoming_size: int) -> LogSegment:
+        segment = self.active_segment
+        if segment.size > 0 and (
+            segment.size + incoming_size > self.config.segment_bytes
+            or time.time_ns() // 1_000_000 - segment.created_ms > self.config.segment_ms
+        ):
+            return self.roll()
+        return segment
+
+    def roll(self) -> LogSegment:
+        self.active_segment.flush()
+        self.active_segment.close()
+        segment = LogSegment.create(self.directory, self.log_end_offset, self.config.index_interval_bytes)
+        self._segments.append(segment)
+        self._base_offsets.append(segment.base_offset)
+        return segment
+
+
+def partition_directory(topic_name: str, partition_index: int) -> str:
+    return os.path.join(LOG_DIR, f"{topic_name}-{partition_index}")
+
+
+_log_config = LogConfig()
+
+
+def configure_logs(config: LogConfig) -> None:
+    global _log_config
+    _log_config = config
+
+
+_logs: dict[tuple[str, int], Log] = {}
+_logs_lock = threading.Lock()
+
+
+def get_log(topic_name: str, partition_index: int) -> Log:
+    with _logs_lock:
+        if (log := _logs.get((topic_name, partition_index))) is None:
+            log = _logs[topic_name, partition_index] = Log(partition_directory(topic_name, partition_index), _log_config)
+        return log
@@ -0,0 +1,106 @@
+import bisect
+import os
+import sys
+from array import array
+
+INDEX_INTERVAL_BYTES = 4096
+
+
+class OffsetIndex:
+    def __init__(self, path: str, base_offset: int, interval_bytes: int = INDEX_INTERVAL_BYTES) -> None:
+        self.path = path
+        self.base_offset = base_offset
+        self._interval_bytes = interval_bytes
+        self._relative_offsets = array("i")
+        self._positions = array("i")
+        self._bytes_since_last_entry = 0
+        self._flushed_entries = 0
+        self._needs_rewrite = True
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    @property
+    def last_offset(self) -> int:
+        return self.base_offset + self._relative_offsets[-1] if self._relative_offsets else -1
+
+    @property
+    def last_position(self) -> int:
+        return self._positions[-1] if self._positions else 0
+
+    def lookup(self, offset: int) -> int:
+        i = bisect.bisect_right(self._relative_offsets, offset - self.base_offset) - 1
+        return self._positions[i] if i >= 0 else 0
+
+    def append(self, offset: int, position: int, size: int) -> bool:
+        appended = offset > self.last_offset and (
+            not self._positions or self._bytes_since_last_entry >= self._interval_bytes
+        )
+        if appended:
+            self._relative_offsets.append(offset - self.base_offset)
+            self._positions.append(position)
+            self._bytes_since_last_entry = 0
+        self._bytes_since_last_entry += size
+        return appended
+
+    def clear(self) -> None:
+        del self._relative_offsets[:]
+        del self._positions[:]
+        self._bytes_since_last_entry = 0
+        self._flushed_entries = 0
+        self._needs_rewrite = True
+
+    def load(self, log_size: int) -> bool:
+        try:
+            with open(self.path, mode="rb") as reader:
+                data = reader.read()
+        except FileNotFoundError:
+            return False
+        if len(data) % 8 != 0:
+            return False
+
+        entries = array("i", data)
+        if sys.byteorder == "little":
+            entries.byteswap()
+        while len(entries) > 2 and entries[-2:] == array("i", [0, 0]):
+            del entries[-2:]
+        relative_offsets, positions = entries[0::2], entries[1::2]
+
+        if not all(a < b for a, b in zip(relative_offsets, relative_offsets[1:])):
+            return False
+        if not all(a < b for a, b in zip(positions, positions[1:])):
+            return False
+        if positions and positions[-1] >= max(log_size, 1):
+            return False
+
+        self._relative_offsets, self._positions = relative_offsets, positions
+        self._flushed_entries = len(positions)
+        self._needs_rewrite = len(data) != 4 * len(entries)
+        return True
+
+    def flush(self) -> None:
+        try:
+            if os.path.getsize(self.path) != 8 * self._flushed_entries:
+                self._needs_rewrite = True
+        except FileNotFoundError:
+            self._needs_rewrite = True
+
+        start = 0 if self._needs_rewrite else self._flushed_entries
+        if start == len(self._positions) and not self._needs_rewrite:
+            return
+
+        entries = array("i", bytes(8 * (len(self._positions) - start)))
+        entries[0::2], entries[1::2] = self._relative_offsets[start:], self._positions[start:]
+        if sys.byteorder == "little":
+            entries.byteswap()
+
+        if self._needs_rewrite:
+            temporary_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(temporary_path, mode="wb") as writer:
+                entries.tofile(writer)
+            os.replace(temporary_path, self.path)
+        else:
+            with open(self.path, mode="ab") as writer:
+                entries.tofile(writer)
+        self._flushed_entries = len(self._positions)
+        self._needs_rewrite = False
@@ -0,0 +1,33 @@
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from .log import LOG_DIR, Log, LogConfig
+
+RECOVERY_CHUNK_SIZE = 16
+
+
+def list_partition_directories() -> list[str]:
+    try:
+        entries = os.scandir(LOG_DIR)
+    except FileNotFoundError:
+        return []
+    with entries:
+        return sorted(
+            entry.path
+            for entry in entries
+            if entry.is_dir() and entry.name.rpartition("-")[2].isdigit() and entry.name.rpartition("-")[0]
+        )
+
+
+def recover_partition(directory: str, config: LogConfig) -> tuple[str, int]:
+    return directory, Log(directory, config).recover()
+
+
+def recover_logs(config: LogConfig, max_workers: int | None = None) -> dict[str, int]:
+    if not (directories := list_partition_directories()):
+        return {}
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return dict(
+            executor.map(recover_partition, directories, itertools.repeat(config), chunksize=RECOVERY_CHUNK_SIZE)
+        )
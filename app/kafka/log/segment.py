@@ -0,0 +1,160 @@
+import os
+import time
+from typing import Self
+
+from .file_records import (
+    BatchPosition,
+    FileRecords,
+    Records,
+    find_timestamp_in_batch,
+    read_mapped_records,
+    scan_batches,
+    verify_batch_crc,
+)
+from .offset_index import INDEX_INTERVAL_BYTES, OffsetIndex
+from .segment_maps import get_segment_maps
+from .time_index import TimeIndex
+
+
+def segment_file_name(base_offset: int, suffix: str) -> str:
+    return f"{base_offset:020d}{suffix}"
+
+
+class LogSegment:
+    def __init__(self, directory: str, base_offset: int, index_interval_bytes: int = INDEX_INTERVAL_BYTES) -> None:
+        self.base_offset = base_offset
+        self.log_path = os.path.join(directory, segment_file_name(base_offset, ".log"))
+        self.index = OffsetIndex(
+            os.path.join(directory, segment_file_name(base_offset, ".index")), base_offset, index_interval_bytes
+        )
+        self.time_index = TimeIndex(os.path.join(directory, segment_file_name(base_offset, ".timeindex")), base_offset)
+        self.size = 0
+        self.next_offset = base_offset
+        self.max_timestamp = -1
+        self.offset_of_max_timestamp = -1
+        self.created_ms = time.time_ns() // 1_000_000
+        self._fd: int | None = None
+
+        if not self._load_indexes(os.path.getsize(self.log_path)):
+            self._reset()
+            self.refresh()
+            self.time_index.flush()
+            self.index.flush()
+        if (first_timestamp := self._first_batch_timestamp()) >= 0:
+            self.created_ms = first_timestamp
+
+    def _first_batch_timestamp(self) -> int:
+        if self.size == 0:
+            return -1
+        with open(self.log_path, mode="rb") as reader:
+            for batch in scan_batches(reader, 0, self.size):
+                return batch.max_timestamp
+        return -1
+
+    def _load_indexes(self, log_size: int) -> bool:
+        if not (self.index.load(log_size) and self.time_index.load()):
+            return False
+        self.size = self.index.last_position
+        self.max_timestamp = self.time_index.last_timestamp
+        self.offset_of_max_timestamp = self.time_index.last_offset
+        self.refresh()
+        return self.time_index.last_offset < self.next_offset
+
+    def _reset(self) -> None:
+        self.index.clear()
+        self.time_index.clear()
+        self.size = 0
+        self.next_offset = self.base_offset
+        self.max_timestamp = -1
+        self.offset_of_max_timestamp = -1
+
+    @classmethod
+    def create(cls, directory: str, base_offset: int, index_interval_bytes: int = INDEX_INTERVAL_BYTES) -> Self:
+        with open(os.path.join(directory, segment_file_name(base_offset, ".log")), mode="ab"):
+            pass
+        return cls(directory, base_offset, index_interval_bytes)
+
+    def read(self, offset: int, max_size: int | None = None, min_one_batch: bool = True) -> Records:
+        self.refresh()
+        start_position = self.index.lookup(offset)
+        if (segment_maps := get_segment_maps()) is not None and self.size > 0:
+            return read_mapped_records(
+                self.log_path,
+                segment_maps.get(self.log_path, self.size),
+                self.size,
+                offset,
+                start_position,
+                max_size,
+                min_one_batch,
+            )
+        return FileRecords.from_offset(self.log_path, offset, start_position, max_size, min_one_batch)
+
+    def append(self, records: bytes | bytearray, batches: list[BatchPosition]) -> None:
+        if self._fd is None:
+            self._fd = os.open(self.log_path, os.O_WRONLY | os.O_APPEND)
+        view = memoryview(records)
+        while view:
+            view = view[os.write(self._fd, view):]
+
+        for batch in batches:
+            self._index_batch(batch, self.size + batch.position)
+        self.size += len(records)
+        self.next_offset = batches[-1].last_offset + 1
+
+    def find_offset_by_timestamp(self, timestamp: int) -> tuple[int, int] | None:
+        if timestamp > self.max_timestamp:
+            return None
+        start_position = self.index.lookup(self.time_index.lookup(timestamp))
+        with open(self.log_path, mode="rb") as reader:
+            for batch in scan_batches(reader, start_position):
+                if batch.end > self.size:
+                    break
+                if batch.max_timestamp >= timestamp:
+                    return find_timestamp_in_batch(os.pread(reader.fileno(), batch.size, batch.position), timestamp)
+        return None
+
+    def flush(self) -> None:
+        self.sync()
+        self.time_index.flush()
+        self.index.flush()
+
+    def sync(self) -> None:
+        if self._fd is not None:
+            os.fsync(self._fd)
+
+    def close(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def recover(self, verify_crc: bool = False) -> int:
+        if verify_crc:
+            self._reset()
+            self.refresh(verify_crc)
+        else:
+            self.refresh()
+
+        log_size = os.path.getsize(self.log_path)
+        if log_size > self.size:
+            os.truncate(self.log_path, self.size)
+        self.time_index.flush()
+        self.index.flush()
+        return log_size - self.size
+
+    def refresh(self, verify_crc: bool = False) -> None:
+        if os.path.getsize(self.log_path) == self.size:
+            return
+        with open(self.log_path, mode="rb") as reader:
+            for batch in scan_batches(reader, self.size):
+                if verify_crc and not verify_batch_crc(os.pread(reader.fileno(), batch.size, batch.position)):
+                    return
+                self._index_batch(batch, batch.position)
+                self.size = batch.end
+                self.next_offset = batch.last_offset + 1
+
+    def _index_batch(self, batch: BatchPosition, position: int) -> None:
+        if batch.max_timestamp > self.max_timestamp:
+            self.max_timestamp = batch.max_timestamp
+            self.offset_of_max_timestamp = batch.last_offset
+        if self.index.append(batch.base_offset, position, batch.size):
+            self.time_index.append(self.max_timestamp, self.offset_of_max_timestamp)
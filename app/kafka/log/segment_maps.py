@@ -0,0 +1,45 @@
+import mmap
+import threading
+from collections import OrderedDict
+
+REMAP_THRESHOLD_BYTES = 64 * 1024
+
+
+class SegmentMaps:
+    def __init__(self, max_maps: int) -> None:
+        self.max_maps = max_maps
+        self._maps: OrderedDict[str, memoryview] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._maps)
+
+    def get(self, path: str, size: int) -> memoryview:
+        with self._lock:
+            view = self._maps.get(path)
+            if view is not None and size - len(view) < REMAP_THRESHOLD_BYTES:
+                self._maps.move_to_end(path)
+                return view[:size]
+
+        with open(path, mode="rb") as reader:
+            view = memoryview(mmap.mmap(reader.fileno(), 0, access=mmap.ACCESS_READ))
+
+        with self._lock:
+            if (current := self._maps.get(path)) is None or len(current) < len(view):
+                self._maps[path] = current = view
+            self._maps.move_to_end(path)
+            while len(self._maps) > self.max_maps:
+                self._maps.popitem(last=False)
+        return current[:size]
+
+
+_segment_maps: SegmentMaps | None = None
+
+
+def configure_segment_maps(max_maps: int) -> None:
+    global _segment_maps
+    _segment_maps = SegmentMaps(max_maps) if max_maps > 0 else None
+
+
+def get_segment_maps() -> SegmentMaps | None:
+    return _segment_maps
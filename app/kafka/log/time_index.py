@@ -0,0 +1,89 @@
+import bisect
+import os
+import struct
+from array import array
+
+TIME_INDEX_ENTRY = struct.Struct(">qi")
+
+
+class TimeIndex:
+    def __init__(self, path: str, base_offset: int) -> None:
+        self.path = path
+        self.base_offset = base_offset
+        self._timestamps = array("q")
+        self._relative_offsets = array("i")
+        self._flushed_entries = 0
+        self._needs_rewrite = True
+
+    def __len__(self) -> int:
+        return len(self._timestamps)
+
+    @property
+    def last_timestamp(self) -> int:
+        return self._timestamps[-1] if self._timestamps else -1
+
+    @property
+    def last_offset(self) -> int:
+        return self.base_offset + self._relative_offsets[-1] if self._relative_offsets else -1
+
+    def lookup(self, timestamp: int) -> int:
+        i = bisect.bisect_left(self._timestamps, timestamp)
+        return self.base_offset + self._relative_offsets[i - 1] + 1 if i > 0 else self.base_offset
+
+    def append(self, timestamp: int, offset: int) -> None:
+        if timestamp > self.last_timestamp:
+            self._timestamps.append(timestamp)
+            self._relative_offsets.append(offset - self.base_offset)
+
+    def clear(self) -> None:
+        del self._timestamps[:]
+        del self._relative_offsets[:]
+        self._flushed_entries = 0
+        self._needs_rewrite = True
+
+    def load(self) -> bool:
+        try:
+            with open(self.path, mode="rb") as reader:
+                data = reader.read()
+        except FileNotFoundError:
+            return False
+        if len(data) % TIME_INDEX_ENTRY.size != 0:
+            return False
+
+        timestamps, relative_offsets = array("q"), array("i")
+        for timestamp, relative_offset in TIME_INDEX_ENTRY.iter_unpack(data):
+            if timestamps and (timestamp <= timestamps[-1] or relative_offset < relative_offsets[-1]):
+                return False
+            timestamps.append(timestamp)
+            relative_offsets.append(relative_offset)
+
+        self._timestamps, self._relative_offsets = timestamps, relative_offsets
+        self._flushed_entries = len(timestamps)
+        self._needs_rewrite = False
+        return True
+
+    def flush(self) -> None:
+        try:
+            if os.path.getsize(self.path) != TIME_INDEX_ENTRY.size * self._flushed_entries:
+                self._needs_rewrite = True
+        except FileNotFoundError:
+            self._needs_rewrite = True
+
+        start = 0 if self._needs_rewrite else self._flushed_entries
+        if start == len(self._timestamps) and not self._needs_rewrite:
+            return
+
+        data = b"".join(
+            TIME_INDEX_ENTRY.pack(timestamp, relative_offset)
+            for timestamp, relative_offset in zip(self._timestamps[start:], self._relative_offsets[start:])
+        )
+        if self._needs_rewrite:
+            temporary_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(temporary_path, mode="wb") as writer:
+                writer.write(data)
+            os.replace(temporary_path, self.path)
+        else:
+            with open(self.path, mode="ab") as writer:
+                writer.write(data)
+        self._flushed_entries = len(self._timestamps)
+        self._needs_rewrite = False
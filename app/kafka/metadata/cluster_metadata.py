@@ -1,9 +1,88 @@
-from collections import defaultdict
+import bisect
+import threading
+from array import array
+from dataclasses import dataclass, field
 from typing import Self
 from uuid import UUID
 
-from .record import PartitionRecord, TopicRecord
+from ..log import get_log
+from .record import FeatureLevelRecord, PartitionRecord, Record, TopicRecord
 from .record_batch import read_record_batches
+from .snapshot import (
+    MetadataSnapshot,
+    SnapshotFeatureLevel,
+    SnapshotPartition,
+    SnapshotTopic,
+    read_latest_snapshot,
+    write_snapshot,
+)
+
+
+class PartitionState:
+    __slots__ = ("partition_index", "leader", "leader_epoch", "partition_epoch", "replicas", "isr")
+
+    def __init__(
+        self,
+        partition_index: int,
+        leader: int,
+        leader_epoch: int,
+        partition_epoch: int,
+        replicas: list[int],
+        isr: list[int],
+    ) -> None:
+        self.partition_index = partition_index
+        self.leader = leader
+        self.leader_epoch = leader_epoch
+        self.partition_epoch = partition_epoch
+        self.replicas = array("i", replicas)
+        self.isr = array("i", isr)
+
+
+@dataclass
+class MetadataImage:
+    feature_levels: dict[str, int] = field(default_factory=dict)
+    name_to_id: dict[str, UUID] = field(default_factory=dict)
+    id_to_name: dict[UUID, str] = field(default_factory=dict)
+    topic_names: list[str] = field(default_factory=list)
+    topic_versions: dict[UUID, int] = field(default_factory=dict)
+    id_to_partitions: dict[UUID, list[int]] = field(default_factory=dict)
+    partitions: dict[tuple[UUID, int], PartitionState] = field(default_factory=dict)
+
+    def copy(self) -> Self:
+        return type(self)(
+            feature_levels=dict(self.feature_levels),
+            name_to_id=dict(self.name_to_id),
+            id_to_name=dict(self.id_to_name),
+            topic_names=self.topic_names,
+            topic_versions=dict(self.topic_versions),
+            id_to_partitions=dict(self.id_to_partitions),
+            partitions=dict(self.partitions),
+        )
+
+    def apply(self, record: Record) -> UUID | None:
+        if isinstance(record, PartitionRecord):
+            key = (record.topic_id, record.partition_id)
+            is_new = key not in self.partitions
+            self.partitions[key] = PartitionState(
+                record.partition_id,
+                record.leader,
+                record.leader_epoch,
+                record.partition_epoch,
+                record.replicas,
+                record.isr,
+            )
+            if is_new:
+                partitions = [*self.id_to_partitions.get(record.topic_id, [])]
+                bisect.insort(partitions, record.partition_id)
+                self.id_to_partitions[record.topic_id] = partitions
+            return record.topic_id
+        if isinstance(record, TopicRecord):
+            self.name_to_id[record.name] = record.topic_id
+            self.id_to_name[record.topic_id] = record.name
+            return record.topic_id
+        if isinstance(record, FeatureLevelRecord):
+            self.feature_levels[record.name] = record.feature_level
+        return None
 
 
 class ClusterMetadata:
@@ -11,33 +90,112 @@ class ClusterMetadata:
 
     def __new__(cls) -> Self:
         if cls._instance is None:
-            cls._instance = super().__new__(cls)
+            instance = super().__new__(cls)
+            instance._initialize()
+            cls._instance = instance
         return cls._instance
 
-    def __init__(self) -> None:
-        self._name_to_id: dict[str, UUID] = {}
-        self._id_to_name: dict[UUID, str] = {}
-        self._id_to_partitions = defaultdict[UUID, list[int]](list)
+    def _initialize(self) -> None:
+        self._update_lock = threading.Lock()
+        self._next_offset = 0
+        self._snapshot_offset = 0
+        self._image = MetadataImage()
+        if (snapshot := read_latest_snapshot(get_log("__cluster_metadata", 0).log_end_offset)) is not None:
+            self._load_snapshot(snapshot)
+        self.update()
+
+    def update(self) -> None:
+        with self._update_lock:
+            image = None
+            next_offset = self._next_offset
+            for record_batch in read_record_batches("__cluster_metadata", 0, next_offset):
+                if image is None:
+                    image = self._image.copy()
+                changed_topic_ids = {image.apply(record) for record in record_batch.records}
+                changed_topic_ids.discard(None)
+                for topic_id in changed_topic_ids:
+                    image.topic_versions[topic_id] = image.topic_versions.get(topic_id, -1) + 1
+                next_offset = record_batch.last_offset + 1
+            if image is None:
+                return
+            if len(image.name_to_id) != len(image.topic_names):
+                image.topic_names = sorted(image.name_to_id)
+            self._image = image
+            self._next_offset = next_offset
 
-        for record_batch in read_record_batches("__cluster_metadata", 0):
-            for record in record_batch.records:
-                if isinstance(record, PartitionRecord):
-                    self._add_partition_record(record)
-                elif isinstance(record, TopicRecord):
-                    self._add_topic_record(record)
+    def maybe_write_snapshot(self, min_records: int) -> bool:
+        with self._update_lock:
+            if self._next_offset - self._snapshot_offset < min_records:
+                return False
+            snapshot = self._snapshot()
+        write_snapshot(snapshot)
+        self._snapshot_offset = snapshot.next_offset
+        return True
+
+    def _snapshot(self) -> MetadataSnapshot:
+        image = self._image
+        return MetadataSnapshot(
+            next_offset=self._next_offset,
+            feature_levels=[SnapshotFeatureLevel(name, level) for name, level in image.feature_levels.items()],
+            topics=[
+                SnapshotTopic(name, topic_id, [
+                    self._snapshot_partition(image.partitions[topic_id, partition_index])
+                    for partition_index in image.id_to_partitions.get(topic_id, [])
+                ])
+                for name, topic_id in image.name_to_id.items()
+            ],
+        )
+
+    @staticmethod
+    def _snapshot_partition(state: PartitionState) -> SnapshotPartition:
+        return SnapshotPartition(
+            partition_index=state.partition_index,
+            leader=state.leader,
+            leader_epoch=state.leader_epoch,
+            partition_epoch=state.partition_epoch,
+            replicas=list(state.replicas),
+            isr=list(state.isr),
+        )
+
+    def _load_snapshot(self, snapshot: MetadataSnapshot) -> None:
+        image = MetadataImage()
+        for feature_level in snapshot.feature_levels:
+            image.feature_levels[feature_level.name] = feature_level.feature_level
+        for topic in snapshot.topics:
+            image.name_to_id[topic.name] = topic.topic_id
+            image.id_to_name[topic.topic_id] = topic.name
+            image.topic_versions[topic.topic_id] = 0
+            image.id_to_partitions[topic.topic_id] = sorted(partition.partition_index for partition in topic.partitions)
+            for partition in topic.partitions:
+                image.partitions[topic.topic_id, partition.partition_index] = PartitionState(
+                    partition.partition_index,
+                    partition.leader,
+                    partition.leader_epoch,
+                    partition.partition_epoch,
+                    partition.replicas,
+                    partition.isr,
+                )
+        image.topic_names = sorted(image.name_to_id)
+        self._image = image
+        self._next_offset = self._snapshot_offset = snapshot.next_offset
+
+    def get_feature_level(self, name: str) -> int | None:
+        return self._image.feature_levels.get(name)
+
+    def get_topic_names(self) -> list[str]:
+        return self._image.topic_names
 
     def get_topic_name(self, topic_id: UUID) -> str | None:
-        return self._id_to_name.get(topic_id)
+        return self._image.id_to_name.get(topic_id)
 
     def get_topic_id(self, topic_name: str) -> UUID | None:
-        return self._name_to_id.get(topic_name)
+        return self._image.name_to_id.get(topic_name)
 
-    def get_topic_partitions(self, topic_id: UUID) -> list[int] | None:
-        return self._id_to_partitions.get(topic_id)
+    def get_topic_version(self, topic_id: UUID) -> int | None:
+        return self._image.topic_versions.get(topic_id)
 
-    def _add_partition_record(self, record: PartitionRecord) -> None:
-        self._id_to_partitions[record.topic_id].append(record.partition_id)
+    def get_topic_partitions(self, topic_id: UUID) -> list[int] | None:
+        return self._image.id_to_partitions.get(topic_id)
 
-    def _add_topic_record(self, record: TopicRecord) -> None:
-        self._name_to_id[record.name] = record.topic_id
-        self._id_to_name[record.topic_id] = record.name
+    def get_partition(self, topic_id: UUID, partition_index: int) -> PartitionState | None:
+        return self._image.partitions.get((topic_id, partition_index))
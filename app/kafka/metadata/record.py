@@ -1,7 +1,7 @@
 import enum
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from io import BytesIO
+from functools import partial
 from typing import Self
 from uuid import UUID
 
@@ -15,30 +15,32 @@ class Record(ABC):
         raise NotImplementedError
 
     @abstractmethod
-    def encode(self) -> bytes:
+    def encode(self, writable: Writable) -> None:
         raise NotImplementedError
 
 
 @dataclass(frozen=True)
 class RecordHeader:
     key: str
-    value: bytes
+    value: bytes | memoryview | None
 
     @classmethod
     def decode(cls, readable: Readable) -> Self:
         key_length = decode_varint(readable)
-        key = readable.read(key_length).decode()
+        key = str(readable.read(key_length), "utf-8")
         value_length = decode_varint(readable)
-        value = readable.read(value_length)
+        value = None if value_length < 0 else readable.read(value_length)
         return cls(key, value)
 
-    def encode(self) -> bytes:
-        return b"".join([
-            encode_varint(len(self.key)),
-            self.key.encode(),
-            encode_varint(len(self.value)),
-            self.value,
-        ])
+    def encode(self, writable: Writable) -> None:
+        key = self.key.encode()
+        encode_varint(writable, len(key))
+        writable.write(key)
+        if self.value is None:
+            encode_varint(writable, -1)
+        else:
+            encode_varint(writable, len(self.value))
+            writable.write(self.value)
 
 
 @dataclass(frozen=True)
@@ -46,21 +48,21 @@ class DefaultRecord(Record):
     attributes: int
     timestamp_delta: int
     offset_delta: int
-    key: bytes | None
-    value: bytes
+    key: bytes | memoryview | None
+    value: bytes | memoryview | None
     headers: list[RecordHeader]
 
     @classmethod
     def decode(cls, readable: Readable) -> Self:
         length = decode_varint(readable)
-        new_readable = BytesIO(readable.read(length))
+        new_readable = ByteReader(readable.read(length))
         attributes = decode_int8(new_readable)
         timestamp_delta = decode_varlong(new_readable)
         offset_delta = decode_varint(new_readable)
         key_length = decode_varint(new_readable)
         key = None if key_length < 0 else new_readable.read(key_length)
         value_length = decode_varint(new_readable)
-        value = new_readable.read(value_length)
+        value = None if value_length < 0 else new_readable.read(value_length)
         headers_count = decode_unsigned_varint(new_readable)
         headers = [RecordHeader.decode(new_readable) for _ in range(headers_count)]
         return cls(
@@ -72,18 +74,27 @@ class DefaultRecord(Record):
             headers=headers,
         )
 
-    def encode(self) -> bytes:
-        data = b"".join([
-            encode_int8(self.attributes),
-            encode_varlong(self.timestamp_delta),
-            encode_varint(self.offset_delta),
-            encode_varint(-1) if self.key is None else encode_varint(len(self.key)) + self.key,
-            encode_varint(len(self.value)),
-            self.value,
-            encode_unsigned_varint(len(self.headers)),
-            b"".join(header.encode() for header in self.headers),
-        ])
-        return encode_varint(len(data)) + data
+    def encode(self, writable: Writable) -> None:
+        start = len(writable)
+        encode_int8(writable, self.attributes)
+        encode_varlong(writable, self.timestamp_delta)
+        encode_varint(writable, self.offset_delta)
+        if self.key is None:
+            encode_varint(writable, -1)
+        else:
+            encode_varint(writable, len(self.key))
+            writable.write(self.key)
+        if self.value is None:
+            encode_varint(writable, -1)
+        else:
+            encode_varint(writable, len(self.value))
+            writable.write(self.value)
+        encode_unsigned_varint(writable, len(self.headers))
+        for header in self.headers:
+            header.encode(writable)
+        length = ByteWriter()
+        encode_varint(length, len(writable) - start)
+        writable.insert(start, length.getvalue())
 
 
 @enum.unique
@@ -97,25 +108,27 @@ class MetadataRecordType(enum.IntEnum):
         return cls(decode_int8(readable))
 
 
+_METADATA_RECORD_HEADER_SCHEMA = Schema(
+    ("frame_version", INT8),
+    ("record_type", INT8),
+    ("version", INT8),
+)
+
+
 @dataclass(frozen=True)
 class MetadataRecord(Record):
     record: DefaultRecord
 
-    @classmethod
-    @abstractmethod
-    def decode_value(cls, record: DefaultRecord, readable: Readable) -> Self:
-        raise NotImplementedError
-
     @classmethod
     def decode(cls, readable: Readable) -> Self:
         record = DefaultRecord.decode(readable)
-        new_readable = BytesIO(record.value)
+        new_readable = ByteReader(record.value)
 
-        frame_version = decode_int8(new_readable)
-        record_type = MetadataRecordType.decode(new_readable)
-        version = decode_int8(new_readable)
+        frame_version, record_type, version = _METADATA_RECORD_HEADER_SCHEMA.decode(new_readable)
+        if record_type not in MetadataRecordType:
+            return UnknownMetadataRecord(record, record_type, version)
 
-        match record_type:
+        match MetadataRecordType(record_type):
             case MetadataRecordType.TOPIC:
                 return TopicRecord.decode_value(record, new_readable)
             case MetadataRecordType.PARTITION:
@@ -123,8 +136,14 @@ class MetadataRecord(Record):
             case MetadataRecordType.FEATURE_LEVEL:
                 return FeatureLevelRecord.decode_value(record, new_readable)
 
-    def encode(self) -> bytes:
-        return self.record.encode()
+    def encode(self, writable: Writable) -> None:
+        self.record.encode(writable)
+
+
+@dataclass(frozen=True)
+class UnknownMetadataRecord(MetadataRecord):
+    record_type: int
+    version: int
 
 
 @dataclass(frozen=True)
@@ -143,6 +162,22 @@ class TopicRecord(MetadataRecord):
         return record
 
 
+_decode_int32_array = partial(decode_compact_array, decode_function=decode_int32)
+
+_PARTITION_RECORD_SCHEMA = Schema(
+    ("partition_id", INT32),
+    ("topic_id", decode_uuid),
+    ("replicas", _decode_int32_array),
+    ("isr", _decode_int32_array),
+    ("removing_replicas", _decode_int32_array),
+    ("adding_replicas", _decode_int32_array),
+    ("leader", INT32),
+    ("leader_epoch", INT32),
+    ("partition_epoch", INT32),
+    ("directories", partial(decode_compact_array, decode_function=decode_uuid)),
+)
+
+
 @dataclass(frozen=True)
 class PartitionRecord(MetadataRecord):
     partition_id: int
@@ -158,19 +193,7 @@ class PartitionRecord(MetadataRecord):
 
     @classmethod
     def decode_value(cls, record: DefaultRecord, readable: Readable) -> Self:
-        record = cls(
-            record=record,
-            partition_id=decode_int32(readable),
-            topic_id=decode_uuid(readable),
-            replicas=decode_compact_array(readable, decode_int32),
-            isr=decode_compact_array(readable, decode_int32),
-            removing_replicas=decode_compact_array(readable, decode_int32),
-            adding_replicas=decode_compact_array(readable, decode_int32),
-            leader=decode_int32(readable),
-            leader_epoch=decode_int32(readable),
-            partition_epoch=decode_int32(readable),
-            directories=decode_compact_array(readable, decode_uuid),
-        )
+        record = cls(record, *_PARTITION_RECORD_SCHEMA.decode(readable))
         decode_tagged_fields(readable)
         return record
 
@@ -1,12 +1,32 @@
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from io import BytesIO
-from typing import Generator, Self
+from typing import Generator, Iterator, Self
 
+from ..log import CompressionType, decompress, get_log
 from ..protocol import *
 from .record import DefaultRecord, MetadataRecord, Record
 
 
+_RECORD_BATCH_PREFIX_SCHEMA = Schema(
+    ("base_offset", INT64),
+    ("batch_length", INT32),
+)
+
+_RECORD_BATCH_HEADER_SCHEMA = Schema(
+    ("partition_leader_epoch", INT32),
+    ("magic", INT8),
+    ("crc", UINT32),
+    ("attributes", INT16),
+    ("last_offset_delta", INT32),
+    ("base_timestamp", INT64),
+    ("max_timestamp", INT64),
+    ("producer_id", INT64),
+    ("producer_epoch", INT16),
+    ("base_sequence", INT32),
+    ("records_count", INT32),
+)
+
+
 @dataclass(frozen=True)
 class RecordBatch(ABC):
     base_offset: int
@@ -20,7 +40,22 @@ class RecordBatch(ABC):
     producer_id: int
     producer_epoch: int
     base_sequence: int
-    records: list[Record]
+    records_count: int
+    records_data: memoryview
+
+    @property
+    def last_offset(self) -> int:
+        return self.base_offset + self.last_offset_delta
+
+    @property
+    def compression_type(self) -> CompressionType:
+        return CompressionType.from_attributes(self.attributes)
+
+    @property
+    def records(self) -> Iterator[Record]:
+        readable = ByteReader(decompress(self.compression_type, self.records_data))
+        for _ in range(self.records_count):
+            yield self.decode_record(readable)
 
     @classmethod
     @abstractmethod
@@ -29,39 +64,21 @@ class RecordBatch(ABC):
 
     @classmethod
     def decode(cls, readable: Readable) -> Self:
-        base_offset = decode_int64(readable)
-        batch_length = decode_int32(readable)
-        new_readable = BytesIO(readable.read(batch_length))
+        base_offset, batch_length = _RECORD_BATCH_PREFIX_SCHEMA.decode(readable)
+        new_readable = ByteReader(readable.read(batch_length))
         return cls(
-            base_offset=base_offset,
-            partition_leader_epoch=decode_int32(new_readable),
-            magic=decode_int8(new_readable),
-            crc=decode_uint32(new_readable),
-            attributes=decode_int16(new_readable),
-            last_offset_delta=decode_int32(new_readable),
-            base_timestamp=decode_int64(new_readable),
-            max_timestamp=decode_int64(new_readable),
-            producer_id=decode_int64(new_readable),
-            producer_epoch=decode_int16(new_readable),
-            base_sequence=decode_int32(new_readable),
-            records=decode_array(new_readable, cls.decode_record),
+            base_offset,
+            *_RECORD_BATCH_HEADER_SCHEMA.decode(new_readable),
+            records_data=new_readable.read(len(new_readable)),
         )
 
-    def encode(self) -> bytes:
-        data = b"".join([
-            encode_int32(self.partition_leader_epoch),
-            encode_int8(self.magic),
-            encode_uint32(self.crc),
-            encode_int16(self.attributes),
-            encode_int32(self.last_offset_delta),
-            encode_int64(self.base_timestamp),
-            encode_int64(self.max_timestamp),
-            encode_int64(self.producer_id),
-            encode_int16(self.producer_epoch),
-            encode_int32(self.base_sequence),
-            encode_array(self.records),
-        ])
-        return encode_int64(self.base_offset) + encode_int32(len(data)) + data
+    def encode(self, writable: Writable) -> None:
+        encode_int64(writable, self.base_offset)
+        length_position = len(writable)
+        encode_int32(writable, 0)
+        _RECORD_BATCH_HEADER_SCHEMA.encode(writable, self)
+        writable.write(self.records_data)
+        writable.patch(INT32, length_position, len(writable) - length_position - 4)
 
 
 class DefaultRecordBatch(RecordBatch):
@@ -76,15 +93,18 @@ class MetadataRecordBatch(RecordBatch):
         return MetadataRecord.decode(readable)
 
 
-def read_record_batches(topic_name: str, partition_index: int) -> Generator[RecordBatch, None, None]:
+def read_record_batches(topic_name: str, partition_index: int, offset: int = 0) -> Generator[RecordBatch, None, None]:
     if topic_name == "__cluster_metadata":
         assert partition_index == 0
         record_batch_class = MetadataRecordBatch
     else:
         record_batch_class = DefaultRecordBatch
 
-    with open(
-        f"/tmp/kraft-combined-logs/{topic_name}-{partition_index}/00000000000000000000.log", mode="rb"
-    ) as reader:
-        while reader.peek():
-            yield record_batch_class.decode(reader)
+    log = get_log(topic_name, partition_index)
+    while len(records := log.read(offset)) > 0:
+        start_offset = offset
+        for batch, data in records.iter_batches():
+            yield record_batch_class.decode(ByteReader(data))
+            offset = batch.last_offset + 1
+        if offset == start_offset:
+            return
@@ -0,0 +1,181 @@
+import os
+import struct
+import zlib
+from dataclasses import dataclass
+from typing import Self
+from uuid import UUID
+
+from ..log import partition_directory
+from ..log.segment import segment_file_name
+from ..protocol import *
+
+SNAPSHOT_VERSION = 1
+SNAPSHOT_SUFFIX = ".metadata-snapshot"
+SNAPSHOTS_RETAINED = 2
+
+
+class CorruptSnapshotError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class SnapshotFeatureLevel:
+    name: str
+    feature_level: int
+
+    @classmethod
+    def decode(cls, readable: Readable) -> Self:
+        feature_level = cls(
+            name=decode_compact_string(readable),
+            feature_level=decode_int16(readable),
+        )
+        decode_tagged_fields(readable)
+        return feature_level
+
+    def encode(self, writable: Writable) -> None:
+        encode_compact_string(writable, self.name)
+        encode_int16(writable, self.feature_level)
+        encode_tagged_fields(writable)
+
+
+@dataclass(frozen=True)
+class SnapshotPartition:
+    partition_index: int
+    leader: int
+    leader_epoch: int
+    partition_epoch: int
+    replicas: list[int]
+    isr: list[int]
+
+    @classmethod
+    def decode(cls, readable: Readable) -> Self:
+        partition = cls(
+            partition_index=decode_int32(readable),
+            leader=decode_int32(readable),
+            leader_epoch=decode_int32(readable),
+            partition_epoch=decode_int32(readable),
+            replicas=decode_compact_array(readable, decode_int32),
+            isr=decode_compact_array(readable, decode_int32),
+        )
+        decode_tagged_fields(readable)
+        return partition
+
+    def encode(self, writable: Writable) -> None:
+        encode_int32(writable, self.partition_index)
+        encode_int32(writable, self.leader)
+        encode_int32(writable, self.leader_epoch)
+        encode_int32(writable, self.partition_epoch)
+        encode_compact_array(writable, self.replicas, encode_int32)
+        encode_compact_array(writable, self.isr, encode_int32)
+        encode_tagged_fields(writable)
+
+
+@dataclass(frozen=True)
+class SnapshotTopic:
+    name: str
+    topic_id: UUID
+    partitions: list[SnapshotPartition]
+
+    @classmethod
+    def decode(cls, readable: Readable) -> Self:
+        topic = cls(
+            name=decode_compact_string(readable),
+            topic_id=decode_uuid(readable),
+            partitions=decode_compact_array(readable, SnapshotPartition.decode),
+        )
+        decode_tagged_fields(readable)
+        return topic
+
+    def encode(self, writable: Writable) -> None:
+        encode_compact_string(writable, self.name)
+        encode_uuid(writable, self.topic_id)
+        encode_compact_array(writable, self.partitions)
+        encode_tagged_fields(writable)
+
+
+@dataclass(frozen=True)
+class MetadataSnapshot:
+    next_offset: int
+    feature_levels: list[SnapshotFeatureLevel]
+    topics: list[SnapshotTopic]
+
+    @classmethod
+    def decode(cls, readable: Readable) -> Self:
+        if (version := decode_int16(readable)) != SNAPSHOT_VERSION:
+            raise CorruptSnapshotError(f"unsupported snapshot version {version}")
+        snapshot = cls(
+            next_offset=decode_int64(readable),
+            feature_levels=decode_compact_array(readable, SnapshotFeatureLevel.decode),
+            topics=decode_compact_array(readable, SnapshotTopic.decode),
+        )
+        decode_tagged_fields(readable)
+        return snapshot
+
+    def encode(self, writable: Writable) -> None:
+        encode_int16(writable, SNAPSHOT_VERSION)
+        encode_int64(writable, self.next_offset)
+        encode_compact_array(writable, self.feature_levels)
+        encode_compact_array(writable, self.topics)
+        encode_tagged_fields(writable)
+
+
+def snapshot_directory() -> str:
+    return partition_directory("__cluster_metadata", 0)
+
+
+def list_snapshot_offsets() -> list[int]:
+    try:
+        file_names = os.listdir(snapshot_directory())
+    except FileNotFoundError:
+        return []
+    return sorted(
+        int(file_name.removesuffix(SNAPSHOT_SUFFIX))
+        for file_name in file_names
+        if file_name.endswith(SNAPSHOT_SUFFIX) and file_name.removesuffix(SNAPSHOT_SUFFIX).isdigit()
+    )
+
+
+def snapshot_path(next_offset: int) -> str:
+    return os.path.join(snapshot_directory(), segment_file_name(next_offset, SNAPSHOT_SUFFIX))
+
+
+def write_snapshot(snapshot: MetadataSnapshot) -> None:
+    writable = ByteWriter()
+    snapshot.encode(writable)
+    data = writable.getvalue()
+    path = snapshot_path(snapshot.next_offset)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as writer:
+        writer.write(data)
+        writer.write(zlib.crc32(data).to_bytes(4))
+        writer.flush()
+        os.fsync(writer.fileno())
+    os.replace(tmp_path, path)
+
+    for next_offset in list_snapshot_offsets()[:-SNAPSHOTS_RETAINED]:
+        try:
+            os.remove(snapshot_path(next_offset))
+        except FileNotFoundError:
+            pass
+
+
+def read_snapshot(next_offset: int) -> MetadataSnapshot:
+    with open(snapshot_path(next_offset), "rb") as reader:
+        data = reader.read()
+    if len(data) < 4 or zlib.crc32(data[:-4]) != int.from_bytes(data[-4:]):
+        raise CorruptSnapshotError(f"snapshot at offset {next_offset} failed its checksum")
+    try:
+        return MetadataSnapshot.decode(ByteReader(memoryview(data)[:-4]))
+    except (AssertionError, EOFError, IndexError, ValueError, struct.error) as e:
+        raise CorruptSnapshotError(f"snapshot at offset {next_offset} is malformed") from e
+
+
+def read_latest_snapshot(max_offset: int) -> MetadataSnapshot | None:
+    for next_offset in reversed(list_snapshot_offsets()):
+        if next_offset > max_offset:
+            continue
+        try:
+            return read_snapshot(next_offset)
+        except (CorruptSnapshotError, OSError):
+            continue
+    return None
@@ -1,14 +1,27 @@
 import enum
-import itertools
-from typing import Callable, Self, Protocol
+import struct
+from typing import Callable, Protocol, Self
 from uuid import UUID
 
 __all__ = [
+    "INT16",
+    "INT32",
+    "INT64",
+    "INT8",
+    "UINT32",
     "ApiKey",
+    "ByteReader",
+    "ByteWriter",
     "ErrorCode",
+    "Payload",
     "Readable",
+    "Schema",
+    "Writable",
     "decode_array",
     "decode_compact_array",
+    "decode_compact_nullable_array",
+    "decode_compact_nullable_bytes",
+    "decode_compact_nullable_string",
     "decode_compact_string",
     "decode_int16",
     "decode_int32",
@@ -24,6 +37,7 @@ __all__ = [
     "encode_array",
     "encode_boolean",
     "encode_compact_array",
+    "encode_compact_nullable_bytes",
     "encode_compact_nullable_string",
     "encode_compact_string",
     "encode_int16",
@@ -39,18 +53,131 @@ __all__ = [
 ]
 
 
-class Readable(Protocol):
-    def read(self, n: int, /) -> bytes:
+INT8 = struct.Struct(">b")
+INT16 = struct.Struct(">h")
+INT32 = struct.Struct(">i")
+INT64 = struct.Struct(">q")
+UINT32 = struct.Struct(">I")
+
+
+class ByteReader:
+    __slots__ = ("_view", "_position")
+
+    def __init__(self, data: bytes | bytearray | memoryview) -> None:
+        self._view = memoryview(data)
+        self._position = 0
+
+    def __len__(self) -> int:
+        return len(self._view) - self._position
+
+    def tell(self) -> int:
+        return self._position
+
+    def read(self, n: int) -> memoryview:
+        start, end = self._position, self._position + n
+        if n < 0 or end > len(self._view):
+            raise EOFError(f"cannot read {n} bytes at position {start} of {len(self._view)}")
+        self._position = end
+        return self._view[start:end]
+
+    def unpack(self, s: struct.Struct) -> tuple:
+        values = s.unpack_from(self._view, self._position)
+        self._position += s.size
+        return values
+
+    def read_unsigned_varint(self) -> int:
+        view, position = self._view, self._position
+        n = shamt = 0
+        while True:
+            c = view[position]
+            position += 1
+            n |= (c & 0x7f) << shamt
+            if c < 0x80:
+                self._position = position
+                return n
+            shamt += 7
+
+
+class Payload(Protocol):
+    def __len__(self) -> int:
         ...
 
+    def read(self) -> bytes:
+        ...
+
+
+class ByteWriter:
+    __slots__ = ("_buffer", "_parts", "_flushed_size")
+
+    def __init__(self) -> None:
+        self._buffer = bytearray()
+        self._parts: list[bytearray | Payload] = []
+        self._flushed_size = 0
+
+    def __len__(self) -> int:
+        return self._flushed_size + len(self._buffer)
+
+    def write(self, data: bytes | bytearray | memoryview) -> None:
+        self._buffer += data
+
+    def pack(self, s: struct.Struct, *values: object) -> None:
+        self._buffer += s.pack(*values)
+
+    def write_unsigned_varint(self, n: int) -> None:
+        buffer = self._buffer
+        while n > 0x7f:
+            buffer.append((n & 0x7f) | 0x80)
+            n >>= 7
+        buffer.append(n)
+
+    def write_payload(self, payload: Payload) -> None:
+        if self._buffer:
+            self._parts.append(self._buffer)
+            self._flushed_size += len(self._buffer)
+            self._buffer = bytearray()
+        self._parts.append(payload)
+        self._flushed_size += len(payload)
 
+    def patch(self, s: struct.Struct, position: int, *values: object) -> None:
+        if position >= self._flushed_size:
+            s.pack_into(self._buffer, position - self._flushed_size, *values)
+            return
+        for part in self._parts:
+            if position < len(part):
+                assert isinstance(part, bytearray), "cannot patch bytes inside a payload"
+                s.pack_into(part, position, *values)
+                return
+            position -= len(part)
+
+    def insert(self, position: int, data: bytes) -> None:
+        assert position >= self._flushed_size, "cannot insert bytes that precede a payload"
+        position -= self._flushed_size
+        self._buffer[position:position] = data
+
+    def parts(self) -> list[bytearray | Payload]:
+        return [*self._parts, self._buffer] if self._buffer else list(self._parts)
+
+    def getvalue(self) -> bytes:
+        return b"".join(part if isinstance(part, bytearray) else part.read() for part in self.parts())
+
+
+type Readable = ByteReader
 type DecodeFunction[T] = Callable[[Readable], T]
-type EncodeFunction[T] = Callable[[T], bytes]
+type Writable = ByteWriter
+type EncodeFunction[T] = Callable[[Writable, T], None]
+type SchemaField = (
+    tuple[str, struct.Struct]
+    | tuple[str, DecodeFunction]
+    | tuple[str, DecodeFunction | None, EncodeFunction]
+)
 
 
 @enum.unique
 class ApiKey(enum.IntEnum):
+    PRODUCE = 0
     FETCH = 1
+    LIST_OFFSETS = 2
+    METADATA = 3
     API_VERSIONS = 18
     DESCRIBE_TOPIC_PARTITIONS = 75
 
@@ -58,129 +185,144 @@ class ApiKey(enum.IntEnum):
     def decode(cls, readable: Readable) -> Self:
         return cls(decode_int16(readable))
 
-    def encode(self) -> bytes:
-        return encode_int16(self)
+    def encode(self, writable: Writable) -> None:
+        encode_int16(writable, self)
 
 
 @enum.unique
 class ErrorCode(enum.IntEnum):
     NONE = 0
+    CORRUPT_MESSAGE = 2
     UNKNOWN_TOPIC_OR_PARTITION = 3
+    INVALID_REQUIRED_ACKS = 21
     UNSUPPORTED_VERSION = 35
+    KAFKA_STORAGE_ERROR = 56
+    FETCH_SESSION_ID_NOT_FOUND = 70
+    INVALID_FETCH_SESSION_EPOCH = 71
+    UNSUPPORTED_COMPRESSION_TYPE = 76
     UNKNOWN_TOPIC_ID = 100
 
-    def encode(self) -> bytes:
-        return encode_int16(self)
+    def encode(self, writable: Writable) -> None:
+        encode_int16(writable, self)
 
 
-def encode_boolean(b: bool) -> bytes:
-    return b.to_bytes(1)
+def encode_boolean(writable: Writable, b: bool) -> None:
+    writable.pack(INT8, b)
 
 
 def decode_int8(readable: Readable) -> int:
-    return int.from_bytes(readable.read(1), signed=True)
+    return readable.unpack(INT8)[0]
 
 
-def encode_int8(n: int) -> bytes:
-    return n.to_bytes(1, signed=True)
+def encode_int8(writable: Writable, n: int) -> None:
+    writable.pack(INT8, n)
 
 
 def decode_int16(readable: Readable) -> int:
-    return int.from_bytes(readable.read(2), signed=True)
+    return readable.unpack(INT16)[0]
 
 
-def encode_int16(n: int) -> bytes:
-    return n.to_bytes(2, signed=True)
+def encode_int16(writable: Writable, n: int) -> None:
+    writable.pack(INT16, n)
 
 
 def decode_int32(readable: Readable) -> int:
-    return int.from_bytes(readable.read(4), signed=True)
+    return readable.unpack(INT32)[0]
 
 
-def encode_int32(n: int) -> bytes:
-    return n.to_bytes(4, signed=True)
+def encode_int32(writable: Writable, n: int) -> None:
+    writable.pack(INT32, n)
 
 
 def decode_int64(readable: Readable) -> int:
-    return int.from_bytes(readable.read(8), signed=True)
+    return readable.unpack(INT64)[0]
 
 
-def encode_int64(n: int) -> bytes:
-    return n.to_bytes(8, signed=True)
+def encode_int64(writable: Writable, n: int) -> None:
+    writable.pack(INT64, n)
 
 
 def decode_uint32(readable: Readable) -> int:
-    return int.from_bytes(readable.read(4))
+    return readable.unpack(UINT32)[0]
 
 
-def encode_uint32(n: int) -> bytes:
-    return n.to_bytes(4)
+def encode_uint32(writable: Writable, n: int) -> None:
+    writable.pack(UINT32, n)
 
 
 def decode_unsigned_varint(readable: Readable) -> int:
-    n = 0
-    for shamt in itertools.count(start=0, step=7):
-        c = ord(readable.read(1))
-        n += (c & 0x7f) << shamt
-        if not (c & 0x80):
-            return n
+    return readable.read_unsigned_varint()
 
 
-def encode_unsigned_varint(n: int) -> bytes:
-    encoding = b""
-    while True:
-        n, c = n >> 7, n & (0x7f)
-        if n > 0:
-            c |= 0x80
-        encoding += c.to_bytes(1)
-        if n == 0:
-            return encoding
+def encode_unsigned_varint(writable: Writable, n: int) -> None:
+    writable.write_unsigned_varint(n)
 
 
 def decode_varint(readable: Readable) -> int:
-    n = decode_unsigned_varint(readable)
+    n = readable.read_unsigned_varint()
     return -((n >> 1) + 1) if (n & 1) else (n >> 1)
 
 
-def encode_varint(n: int) -> bytes:
-    return encode_unsigned_varint((n << 1) ^ (n >> 31))
+def encode_varint(writable: Writable, n: int) -> None:
+    writable.write_unsigned_varint((n << 1) ^ (n >> 31))
 
 
 def decode_varlong(readable: Readable) -> int:
     return decode_varint(readable)
 
 
-def encode_varlong(n: int) -> bytes:
-    return encode_unsigned_varint((n << 1) ^ (n >> 63))
+def encode_varlong(writable: Writable, n: int) -> None:
+    writable.write_unsigned_varint((n << 1) ^ (n >> 63))
 
 
 def decode_uuid(readable: Readable) -> UUID:
-    return UUID(bytes=readable.read(16))
+    return UUID(bytes=bytes(readable.read(16)))
 
 
-def encode_uuid(u: UUID) -> bytes:
-    return u.bytes
+def encode_uuid(writable: Writable, u: UUID) -> None:
+    writable.write(u.bytes)
 
 
 def decode_compact_string(readable: Readable) -> str:
     n = decode_unsigned_varint(readable)
     assert n > 0, "incorrect compact string format"
-    return readable.read(n - 1).decode()
+    return str(readable.read(n - 1), "utf-8")
+
 
+def encode_compact_string(writable: Writable, s: str) -> None:
+    data = s.encode()
+    writable.write_unsigned_varint(len(data) + 1)
+    writable.write(data)
 
-def encode_compact_string(s: str) -> bytes:
-    return encode_unsigned_varint(len(s) + 1) + s.encode()
+
+def decode_compact_nullable_string(readable: Readable) -> str | None:
+    n = decode_unsigned_varint(readable)
+    return None if n == 0 else str(readable.read(n - 1), "utf-8")
 
 
 def decode_nullable_string(readable: Readable) -> str | None:
     n = decode_int16(readable)
-    return None if n < 0 else readable.read(n).decode()
+    return None if n < 0 else str(readable.read(n), "utf-8")
 
 
-def encode_compact_nullable_string(s: str | None) -> bytes:
+def encode_compact_nullable_string(writable: Writable, s: str | None) -> None:
     if s is None:
-        return encode_unsigned_varint(0)
-    return encode_unsigned_varint(len(s) + 1) + s.encode()
+        writable.write_unsigned_varint(0)
+    else:
+        encode_compact_string(writable, s)
+
+
+def decode_compact_nullable_bytes(readable: Readable) -> memoryview | None:
+    n = decode_unsigned_varint(readable)
+    return None if n == 0 else readable.read(n - 1)
+
+
+def encode_compact_nullable_bytes(writable: Writable, b: bytes | memoryview | None) -> None:
+    if b is None:
+        writable.write_unsigned_varint(0)
+    else:
+        writable.write_unsigned_varint(len(b) + 1)
+        writable.write(b)
 
 
 def decode_array[T](readable: Readable, decode_function: DecodeFunction[T]) -> list[T]:
@@ -188,10 +330,9 @@ def decode_array[T](readable: Readable, decode_function: DecodeFunction[T]) -> l
     return [] if n < 0 else [decode_function(readable) for _ in range(n)]
 
 
-def encode_array[T](arr: list[T], encode_function: EncodeFunction[T] | None = None) -> bytes:
-    return encode_int32(len(arr)) + b"".join(
-        t.encode() if encode_function is None else encode_function(t) for t in arr
-    )
+def encode_array[T](writable: Writable, arr: list[T], encode_function: EncodeFunction[T] | None = None) -> None:
+    writable.pack(INT32, len(arr))
+    _encode_elements(writable, arr, encode_function)
 
 
 def decode_compact_array[T](readable: Readable, decode_function: DecodeFunction[T]) -> list[T]:
@@ -199,15 +340,67 @@ def decode_compact_array[T](readable: Readable, decode_function: DecodeFunction[
     return [] if n == 0 else [decode_function(readable) for _ in range(n - 1)]
 
 
-def encode_compact_array[T](arr: list[T], encode_function: EncodeFunction[T] | None = None) -> bytes:
-    return encode_unsigned_varint(len(arr) + 1) + b"".join(
-        t.encode() if encode_function is None else encode_function(t) for t in arr
-    )
+def decode_compact_nullable_array[T](readable: Readable, decode_function: DecodeFunction[T]) -> list[T] | None:
+    n = decode_unsigned_varint(readable)
+    return None if n == 0 else [decode_function(readable) for _ in range(n - 1)]
 
 
-def decode_tagged_fields(readable: Readable) -> None:
-    assert readable.read(1) == b"\x00", "incorrect tagged fields format"
+def encode_compact_array[T](writable: Writable, arr: list[T], encode_function: EncodeFunction[T] | None = None) -> None:
+    writable.write_unsigned_varint(len(arr) + 1)
+    _encode_elements(writable, arr, encode_function)
+
 
+def _encode_elements[T](writable: Writable, arr: list[T], encode_function: EncodeFunction[T] | None) -> None:
+    if encode_function is None:
+        for t in arr:
+            t.encode(writable)
+    else:
+        for t in arr:
+            encode_function(writable, t)
 
-def encode_tagged_fields() -> bytes:
-    return b"\x00"
+
+def decode_tagged_fields(readable: Readable) -> None:
+    assert decode_unsigned_varint(readable) == 0, "incorrect tagged fields format"
+
+
+def encode_tagged_fields(writable: Writable) -> None:
+    writable.write_unsigned_varint(0)
+
+
+class Schema:
+    __slots__ = ("_runs", "_decoders", "_fixed", "_decodable")
+
+    def __init__(self, *fields: SchemaField) -> None:
+        self._runs: list[tuple[tuple[str, ...], struct.Struct | tuple[Callable, ...]]] = []
+        for name, *codec in fields:
+            if isinstance(codec[0], struct.Struct):
+                if self._runs and isinstance(self._runs[-1][1], struct.Struct):
+                    names, s = self._runs[-1]
+                    self._runs[-1] = (names + (name,), struct.Struct(s.format + codec[0].format.lstrip("><!=@")))
+                else:
+                    self._runs.append(((name,), codec[0]))
+            else:
+                self._runs.append(((name,), tuple(codec)))
+        self._decoders = [(None, codec[0]) if isinstance(codec, tuple) else (codec, None) for _, codec in self._runs]
+        self._fixed = self._runs[0][1] if len(self._runs) == 1 and isinstance(self._runs[0][1], struct.Struct) else None
+        self._decodable = all(s is not None or decode_function is not None for s, decode_function in self._decoders)
+
+    def decode(self, readable: Readable) -> tuple | list:
+        assert self._decodable, "schema has encode-only fields"
+        if self._fixed is not None:
+            return readable.unpack(self._fixed)
+        values = []
+        for s, decode_function in self._decoders:
+            if s is None:
+                values.append(decode_function(readable))
+            else:
+                values.extend(readable.unpack(s))
+        return values
+
+    def encode(self, writable: Writable, obj: object) -> None:
+        for names, codec in self._runs:
+            if isinstance(codec, struct.Struct):
+                writable.pack(codec, *[getattr(obj, name) for name in names])
+            else:
+                assert len(codec) == 2, f"field {names[0]} has no encoder"
+                codec[1](writable, getattr(obj, names[0]))
@@ -1,2 +1,4 @@
+from .fetch import configure_fetch_sessions
+from .handlers import get_api_handlers
 from .request import Request, decode_request
 from .response import Response, handle_request
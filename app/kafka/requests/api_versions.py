@@ -2,8 +2,9 @@ from dataclasses import dataclass
 from typing import Self
 
 from ..protocol import *
+from .handlers import ApiHandler, get_api_handlers
 from .request import Request, RequestHeader
-from .response import Response, ResponseHeader
+from .response import EncodedResponse, Response, ResponseHeader
 
 
 @dataclass(frozen=True)
@@ -28,13 +29,11 @@ class ApiVersion:
     min_version: int
     max_version: int
 
-    def encode(self) -> bytes:
-        return b"".join([
-            self.api_key.encode(),
-            encode_int16(self.min_version),
-            encode_int16(self.max_version),
-            encode_tagged_fields(),
-        ])
+    def encode(self, writable: Writable) -> None:
+        self.api_key.encode(writable)
+        encode_int16(writable, self.min_version)
+        encode_int16(writable, self.max_version)
+        encode_tagged_fields(writable)
 
 
 @dataclass(frozen=True)
@@ -43,31 +42,48 @@ class ApiVersionsResponse(Response):
     api_keys: list[ApiVersion]
     throttle_time_ms: int
 
-    def _encode_header(self) -> bytes:
-        return self.header.encode(version=0)
+    def _encode_header(self, writable: Writable) -> None:
+        self.header.encode(writable, version=0)
 
-    def _encode_body(self) -> bytes:
-        return b"".join([
-            self.error_code.encode(),
-            encode_compact_array(self.api_keys),
-            encode_int32(self.throttle_time_ms),
-            encode_tagged_fields(),
-        ])
+    def _encode_body(self, writable: Writable) -> None:
+        self.error_code.encode(writable)
+        encode_compact_array(writable, self.api_keys)
+        encode_int32(writable, self.throttle_time_ms)
+        encode_tagged_fields(writable)
 
 
-def handle_api_versions_request(request: ApiVersionsRequest) -> ApiVersionsResponse:
-    if request.header.request_api_version == 4:
+_encoded_bodies: dict[ErrorCode, bytes] = {}
+
+
+def register_api_versions(api_handlers: dict[ApiKey, ApiHandler]) -> None:
+    for error_code in (ErrorCode.NONE, ErrorCode.UNSUPPORTED_VERSION):
+        _encoded_bodies[error_code] = _encode_api_versions_body(error_code, api_handlers)
+
+
+def handle_api_versions_request(request: ApiVersionsRequest) -> EncodedResponse:
+    api_handler = get_api_handlers()[ApiKey.API_VERSIONS]
+    if api_handler.min_version <= request.header.request_api_version <= api_handler.max_version:
         error_code = ErrorCode.NONE
     else:
         error_code = ErrorCode.UNSUPPORTED_VERSION
 
-    return ApiVersionsResponse(
+    return EncodedResponse(
         header=ResponseHeader.from_request_header(request.header),
+        body=_encoded_bodies[error_code],
+        header_version=0,
+    )
+
+
+def _encode_api_versions_body(error_code: ErrorCode, api_handlers: dict[ApiKey, ApiHandler]) -> bytes:
+    response = ApiVersionsResponse(
+        header=ResponseHeader(correlation_id=0),
         error_code=error_code,
         api_keys=[
-            ApiVersion(ApiKey.FETCH, min_version=16, max_version=16),
-            ApiVersion(ApiKey.API_VERSIONS, min_version=4, max_version=4),
-            ApiVersion(ApiKey.DESCRIBE_TOPIC_PARTITIONS, min_version=0, max_version=0),
+            ApiVersion(api_key, api_handler.min_version, api_handler.max_version)
+            for api_key, api_handler in sorted(api_handlers.items())
         ],
         throttle_time_ms=0,
     )
+    writable = ByteWriter()
+    response._encode_body(writable)
+    return writable.getvalue()
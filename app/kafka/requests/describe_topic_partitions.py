@@ -1,4 +1,6 @@
+import bisect
 from dataclasses import dataclass, field
+from functools import partial
 from typing import Self
 from uuid import UUID
 
@@ -7,6 +9,8 @@ from ..protocol import *
 from .request import Request, RequestHeader
 from .response import Response, ResponseHeader
 
+MAX_RESPONSE_PARTITION_LIMIT = 2000
+
 
 @dataclass(frozen=True)
 class Cursor:
@@ -15,7 +19,7 @@ class Cursor:
 
     @classmethod
     def decode(cls, readable: Readable) -> Self | None:
-        if (ord(readable.read(1)) & 0x80):
+        if decode_int8(readable) < 0:
             return None
         cursor = cls(
             topic_name=decode_compact_string(readable),
@@ -25,14 +29,14 @@ class Cursor:
         return cursor
 
 
-def encode_cursor(cursor: Cursor | None) -> bytes:
+def encode_cursor(writable: Writable, cursor: Cursor | None) -> None:
     if cursor is None:
-        return b"\xff"
-    return b"\x01" + b"".join([
-        encode_compact_string(cursor.topic_name),
-        encode_int32(cursor.partition_index),
-        encode_tagged_fields(),
-    ])
+        encode_int8(writable, -1)
+        return
+    encode_int8(writable, 1)
+    encode_compact_string(writable, cursor.topic_name)
+    encode_int32(writable, cursor.partition_index)
+    encode_tagged_fields(writable)
 
 
 @dataclass(frozen=True)
@@ -64,6 +68,24 @@ class DescribeTopicPartitionsRequest(Request):
         return request
 
 
+_NODE_ARRAY = (
+    partial(decode_compact_array, decode_function=decode_int32),
+    partial(encode_compact_array, encode_function=encode_int32),
+)
+
+_RESPONSE_PARTITION_SCHEMA = Schema(
+    ("error_code", INT16),
+    ("partition_index", INT32),
+    ("leader_id", INT32),
+    ("leader_epoch", INT32),
+    ("replica_nodes", *_NODE_ARRAY),
+    ("isr_nodes", *_NODE_ARRAY),
+    ("eligible_leader_replicas", *_NODE_ARRAY),
+    ("last_known_elr", *_NODE_ARRAY),
+    ("offline_replicas", *_NODE_ARRAY),
+)
+
+
 @dataclass(frozen=True)
 class ResponsePartition:
     error_code: ErrorCode
@@ -76,19 +98,9 @@ class ResponsePartition:
     last_known_elr: list[int] = field(default_factory=list)
     offline_replicas: list[int] = field(default_factory=list)
 
-    def encode(self) -> bytes:
-        return b"".join([
-            self.error_code.encode(),
-            encode_int32(self.partition_index),
-            encode_int32(self.leader_id),
-            encode_int32(self.leader_epoch),
-            encode_compact_array(self.replica_nodes, encode_int32),
-            encode_compact_array(self.isr_nodes, encode_int32),
-            encode_compact_array(self.eligible_leader_replicas, encode_int32),
-            encode_compact_array(self.last_known_elr, encode_int32),
-            encode_compact_array(self.offline_replicas, encode_int32),
-            encode_tagged_fields(),
-        ])
+    def encode(self, writable: Writable) -> None:
+        _RESPONSE_PARTITION_SCHEMA.encode(writable, self)
+        encode_tagged_fields(writable)
 
 
 @dataclass(frozen=True)
@@ -100,16 +112,14 @@ class ResponseTopic:
     partitions: list[ResponsePartition] = field(default_factory=list)
     topic_authorized_operations: int = 0
 
-    def encode(self) -> bytes:
-        return b"".join([
-            self.error_code.encode(),
-            encode_compact_nullable_string(self.name),
-            encode_uuid(self.topic_id),
-            encode_boolean(self.is_internal),
-            encode_compact_array(self.partitions),
-            encode_int32(self.topic_authorized_operations),
-            encode_tagged_fields(),
-        ])
+    def encode(self, writable: Writable) -> None:
+        self.error_code.encode(writable)
+        encode_compact_nullable_string(writable, self.name)
+        encode_uuid(writable, self.topic_id)
+        encode_boolean(writable, self.is_internal)
+        encode_compact_array(writable, self.partitions)
+        encode_int32(writable, self.topic_authorized_operations)
+        encode_tagged_fields(writable)
 
 
 @dataclass(frozen=True)
@@ -118,39 +128,76 @@ class DescribeTopicPartitionsResponse(Response):
     topics: list[ResponseTopic]
     cursor: Cursor | None = None
 
-    def _encode_body(self) -> bytes:
-        return b"".join([
-            encode_int32(self.throttle_time_ms),
-            encode_compact_array(self.topics),
-            encode_cursor(self.cursor),
-            encode_tagged_fields(),
-        ])
+    def _encode_body(self, writable: Writable) -> None:
+        encode_int32(writable, self.throttle_time_ms)
+        encode_compact_array(writable, self.topics)
+        encode_cursor(writable, self.cursor)
+        encode_tagged_fields(writable)
 
 
 def handle_describe_topic_partitions_request(request: DescribeTopicPartitionsRequest) -> DescribeTopicPartitionsResponse:
+    cluster_metadata = ClusterMetadata()
+    if request.topics:
+        topic_names = sorted({topic_request.name for topic_request in request.topics})
+    else:
+        topic_names = cluster_metadata.get_topic_names()
+
+    start_index = 0 if request.cursor is None else bisect.bisect_left(topic_names, request.cursor.topic_name)
+    remaining = min(max(request.response_partition_limit, 1), MAX_RESPONSE_PARTITION_LIMIT)
+    topics: list[ResponseTopic] = []
+    next_cursor = None
+    for index in range(start_index, len(topic_names)):
+        topic_name = topic_names[index]
+        if remaining == 0:
+            next_cursor = Cursor(topic_name, 0)
+            break
+        start_partition = 0
+        if request.cursor is not None and topic_name == request.cursor.topic_name:
+            start_partition = request.cursor.partition_index
+        topic, next_partition = _handle_topic_request(cluster_metadata, topic_name, start_partition, remaining)
+        topics.append(topic)
+        remaining -= len(topic.partitions)
+        if next_partition is not None:
+            next_cursor = Cursor(topic_name, next_partition)
+            break
+
     return DescribeTopicPartitionsResponse(
         header=ResponseHeader.from_request_header(request.header),
         throttle_time_ms=0,
-        topics=[_handle_topic_request(topic_request) for topic_request in request.topics],
+        topics=topics,
+        cursor=next_cursor,
     )
 
 
-def _handle_topic_request(topic_request: TopicRequest) -> ResponseTopic:
-    cluster_metadata = ClusterMetadata()
-
-    if (topic_id := cluster_metadata.get_topic_id(topic_request.name)) is None:
-        return ResponseTopic(
+def _handle_topic_request(
+    cluster_metadata: ClusterMetadata, topic_name: str, start_partition: int, limit: int
+) -> tuple[ResponseTopic, int | None]:
+    if (topic_id := cluster_metadata.get_topic_id(topic_name)) is None:
+        topic = ResponseTopic(
             error_code=ErrorCode.UNKNOWN_TOPIC_OR_PARTITION,
-            name=topic_request.name,
+            name=topic_name,
             topic_id=UUID(int=0),
         )
+        return topic, None
 
-    return ResponseTopic(
+    partition_indexes = cluster_metadata.get_topic_partitions(topic_id) or []
+    start_index = bisect.bisect_left(partition_indexes, start_partition)
+    end_index = start_index + limit
+    topic = ResponseTopic(
         error_code=ErrorCode.NONE,
-        name=topic_request.name,
+        name=topic_name,
         topic_id=topic_id,
         partitions=[
-            ResponsePartition(error_code=ErrorCode.NONE, partition_index=partition_index)
-            for partition_index in cluster_metadata.get_topic_partitions(topic_id)
+            ResponsePartition(
+                error_code=ErrorCode.NONE,
+                partition_index=partition_index,
+                leader_id=partition.leader,
+                leader_epoch=partition.leader_epoch,
+                replica_nodes=partition.replicas,
+                isr_nodes=partition.isr,
+            )
+            for partition_index in partition_indexes[start_index:end_index]
+            if (partition := cluster_metadata.get_partition(topic_id, partition_index)) is not None
         ],
     )
+    return topic, partition_indexes[end_index] if end_index < len(partition_indexes) else None
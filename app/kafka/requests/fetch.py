@@ -1,12 +1,32 @@
+import asyncio
+import random
+from collections import OrderedDict
 from dataclasses import dataclass, field
+from functools import partial
 from typing import Self
 from uuid import UUID
 
-from ..metadata import ClusterMetadata, RecordBatch, read_record_batches
+from ..executor import run_blocking
+from ..log import Records, get_log, get_log_appender
+from ..metadata import ClusterMetadata
 from ..protocol import *
 from .request import Request, RequestHeader
 from .response import Response, ResponseHeader
 
+INVALID_SESSION_ID = 0
+INITIAL_EPOCH = 0
+FINAL_EPOCH = -1
+MAX_SESSION_ID = 2**31 - 1
+
+_FETCH_PARTITION_SCHEMA = Schema(
+    ("partition", INT32),
+    ("current_leader_epoch", INT32),
+    ("fetch_offset", INT64),
+    ("last_fetched_epoch", INT32),
+    ("log_start_offset", INT64),
+    ("partition_max_bytes", INT32),
+)
+
 
 @dataclass(frozen=True)
 class FetchPartition:
@@ -19,14 +39,7 @@ class FetchPartition:
 
     @classmethod
     def decode(cls, readable: Readable) -> Self:
-        fetch_partition = cls(
-            partition=decode_int32(readable),
-            current_leader_epoch=decode_int32(readable),
-            fetch_offset=decode_int64(readable),
-            last_fetched_epoch=decode_int32(readable),
-            log_start_offset=decode_int64(readable),
-            partition_max_bytes=decode_int32(readable),
-        )
+        fetch_partition = cls(*_FETCH_PARTITION_SCHEMA.decode(readable))
         decode_tagged_fields(readable)
         return fetch_partition
 
@@ -61,6 +74,19 @@ class ForgottenTopic:
         return forgotten_topic
 
 
+_FETCH_REQUEST_SCHEMA = Schema(
+    ("max_wait_ms", INT32),
+    ("min_bytes", INT32),
+    ("max_bytes", INT32),
+    ("isolation_level", INT8),
+    ("session_id", INT32),
+    ("session_epoch", INT32),
+    ("topics", partial(decode_compact_array, decode_function=FetchTopic.decode)),
+    ("forgotten_topics_data", partial(decode_compact_array, decode_function=ForgottenTopic.decode)),
+    ("rack_id", decode_compact_string),
+)
+
+
 @dataclass(frozen=True)
 class FetchRequest(Request):
     max_wait_ms: int
@@ -70,23 +96,12 @@ class FetchRequest(Request):
     session_id: int
     session_epoch: int
     topics: list[FetchTopic]
-    forgotten_topics_data: list
+    forgotten_topics_data: list[ForgottenTopic]
     rack_id: str
 
     @classmethod
     def decode_body(cls, header: RequestHeader, readable: Readable) -> Self:
-        request = cls(
-            header=header,
-            max_wait_ms=decode_int32(readable),
-            min_bytes=decode_int32(readable),
-            max_bytes=decode_int32(readable),
-            isolation_level=decode_int8(readable),
-            session_id=decode_int32(readable),
-            session_epoch=decode_int32(readable),
-            topics=decode_compact_array(readable, FetchTopic.decode),
-            forgotten_topics_data=decode_compact_array(readable, ForgottenTopic.decode),
-            rack_id=decode_compact_string(readable),
-        )
+        request = cls(header, *_FETCH_REQUEST_SCHEMA.decode(readable))
         decode_tagged_fields(readable)
         return request
 
@@ -96,12 +111,10 @@ class AbortedTransaction:
     producer_id: int
     first_offset: int
 
-    def encode(self) -> bytes:
-        return b"".join([
-            encode_int64(self.producer_id),
-            encode_int64(self.first_offset),
-            encode_tagged_fields(),
-        ])
+    def encode(self, writable: Writable) -> None:
+        encode_int64(writable, self.producer_id)
+        encode_int64(writable, self.first_offset)
+        encode_tagged_fields(writable)
 
 
 @dataclass(frozen=True)
@@ -113,22 +126,23 @@ class PartitionData:
     log_start_offset: int = 0
     aborted_transactions: list[AbortedTransaction] = field(default_factory=list)
     preferred_read_replica: int = 0
-    records: list[RecordBatch] = field(default_factory=list)
-
-    def encode(self) -> bytes:
-        encoded_records = b"".join(record.encode() for record in self.records)
-        return b"".join([
-            encode_int32(self.partition_index),
-            self.error_code.encode(),
-            encode_int64(self.high_watermark),
-            encode_int64(self.last_stable_offset),
-            encode_int64(self.log_start_offset),
-            encode_compact_array(self.aborted_transactions),
-            encode_int32(self.preferred_read_replica),
-            encode_unsigned_varint(len(encoded_records)),
-            encoded_records,
-            encode_tagged_fields(),
-        ])
+    records: Records | None = None
+
+    def encode(self, writable: Writable) -> None:
+        encode_int32(writable, self.partition_index)
+        self.error_code.encode(writable)
+        encode_int64(writable, self.high_watermark)
+        encode_int64(writable, self.last_stable_offset)
+        encode_int64(writable, self.log_start_offset)
+        encode_compact_array(writable, self.aborted_transactions)
+        encode_int32(writable, self.preferred_read_replica)
+        if self.records is None:
+            encode_unsigned_varint(writable, 0)
+        else:
+            encode_unsigned_varint(writable, len(self.records))
+            if len(self.records) > 0:
+                writable.write_payload(self.records)
+        encode_tagged_fields(writable)
 
 
 @dataclass(frozen=True)
@@ -136,12 +150,10 @@ class FetchableTopicResponse:
     topic_id: UUID
     partitions: list[PartitionData]
 
-    def encode(self) -> bytes:
-        return b"".join([
-            encode_uuid(self.topic_id),
-            encode_compact_array(self.partitions),
-            encode_tagged_fields(),
-        ])
+    def encode(self, writable: Writable) -> None:
+        encode_uuid(writable, self.topic_id)
+        encode_compact_array(writable, self.partitions)
+        encode_tagged_fields(writable)
 
 
 @dataclass(frozen=True)
@@ -151,45 +163,239 @@ class FetchResponse(Response):
     session_id: int
     responses: list[FetchableTopicResponse]
 
-    def _encode_body(self) -> bytes:
-        return b"".join([
-            encode_int32(self.throttle_time_ms),
-            self.error_code.encode(),
-            encode_int32(self.session_id),
-            encode_compact_array(self.responses),
-            encode_tagged_fields(),
-        ])
+    def _encode_body(self, writable: Writable) -> None:
+        encode_int32(writable, self.throttle_time_ms)
+        self.error_code.encode(writable)
+        encode_int32(writable, self.session_id)
+        encode_compact_array(writable, self.responses)
+        encode_tagged_fields(writable)
+
+
+class FetchSession:
+    __slots__ = ("session_id", "epoch", "partitions", "sent_offsets")
+
+    def __init__(self, session_id: int) -> None:
+        self.session_id = session_id
+        self.epoch = _next_epoch(INITIAL_EPOCH)
+        self.partitions: OrderedDict[tuple[UUID, int], FetchPartition] = OrderedDict()
+        self.sent_offsets: dict[tuple[UUID, int], tuple[int, int]] = {}
+
+    def update(self, fetch_topics: list[FetchTopic], forgotten_topics: list[ForgottenTopic]) -> None:
+        for fetch_topic in fetch_topics:
+            for fetch_partition in fetch_topic.partitions:
+                self.partitions[fetch_topic.topic_id, fetch_partition.partition] = fetch_partition
+        for forgotten_topic in forgotten_topics:
+            for partition in forgotten_topic.partitions:
+                self.partitions.pop((forgotten_topic.topic_id, partition), None)
+                self.sent_offsets.pop((forgotten_topic.topic_id, partition), None)
+
+    def fetch_topics(self) -> list[FetchTopic]:
+        fetch_topics: list[FetchTopic] = []
+        for (topic_id, _), fetch_partition in self.partitions.items():
+            if not fetch_topics or fetch_topics[-1].topic_id != topic_id:
+                fetch_topics.append(FetchTopic(topic_id, []))
+            fetch_topics[-1].partitions.append(fetch_partition)
+        return fetch_topics
+
+    def filter_incremental(self, responses: list[FetchableTopicResponse]) -> list[FetchableTopicResponse]:
+        filtered = []
+        for response in responses:
+            partitions = [
+                partition
+                for partition in response.partitions
+                if partition.error_code != ErrorCode.NONE
+                or (partition.records is not None and len(partition.records) > 0)
+                or self.sent_offsets.get((response.topic_id, partition.partition_index))
+                != (partition.high_watermark, partition.log_start_offset)
+            ]
+            if partitions:
+                filtered.append(FetchableTopicResponse(topic_id=response.topic_id, partitions=partitions))
+        return filtered
+
+    def rotate(self, responses: list[FetchableTopicResponse]) -> None:
+        for response in responses:
+            for partition in response.partitions:
+                key = (response.topic_id, partition.partition_index)
+                if key not in self.partitions:
+                    continue
+                if partition.error_code == ErrorCode.NONE:
+                    self.sent_offsets[key] = (partition.high_watermark, partition.log_start_offset)
+                if partition.records is not None and len(partition.records) > 0:
+                    self.partitions.move_to_end(key)
+
+
+class FetchSessionCache:
+    def __init__(self, max_sessions: int) -> None:
+        self._max_sessions = max_sessions
+        self._sessions: OrderedDict[int, FetchSession] = OrderedDict()
+
+    def get(self, session_id: int) -> FetchSession | None:
+        if (session := self._sessions.get(session_id)) is not None:
+            self._sessions.move_to_end(session_id)
+        return session
+
+    def create(self) -> FetchSession | None:
+        if self._max_sessions <= 0:
+            return None
+        while len(self._sessions) >= self._max_sessions:
+            self._sessions.popitem(last=False)
+        while (session_id := random.randint(1, MAX_SESSION_ID)) in self._sessions:
+            pass
+        session = self._sessions[session_id] = FetchSession(session_id)
+        return session
+
+    def remove(self, session_id: int) -> None:
+        self._sessions.pop(session_id, None)
+
+
+_fetch_session_cache: FetchSessionCache | None = None
+
+
+def configure_fetch_sessions(max_sessions: int) -> None:
+    global _fetch_session_cache
+    _fetch_session_cache = FetchSessionCache(max_sessions)
 
 
-def handle_fetch_request(request: FetchRequest) -> FetchResponse:
+def get_fetch_session_cache() -> FetchSessionCache:
+    if _fetch_session_cache is None:
+        configure_fetch_sessions(1000)
+    return _fetch_session_cache
+
+
+def _next_epoch(epoch: int) -> int:
+    return 1 if epoch == MAX_SESSION_ID else epoch + 1
+
+
+async def handle_fetch_request(request: FetchRequest) -> FetchResponse:
+    fetch_session_cache = get_fetch_session_cache()
+    if request.session_id != INVALID_SESSION_ID and request.session_epoch in (INITIAL_EPOCH, FINAL_EPOCH):
+        fetch_session_cache.remove(request.session_id)
+
+    incremental = False
+    if request.session_epoch == INITIAL_EPOCH:
+        if (session := fetch_session_cache.create()) is not None:
+            session.update(request.topics, [])
+    elif request.session_epoch == FINAL_EPOCH:
+        session = None
+    elif (session := fetch_session_cache.get(request.session_id)) is None:
+        return _fetch_error_response(request, ErrorCode.FETCH_SESSION_ID_NOT_FOUND)
+    elif session.epoch != request.session_epoch:
+        return _fetch_error_response(request, ErrorCode.INVALID_FETCH_SESSION_EPOCH)
+    else:
+        session.update(request.topics, request.forgotten_topics_data)
+        incremental = True
+        session.epoch = _next_epoch(session.epoch)
+
+    fetch_topics = request.topics if session is None else session.fetch_topics()
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + request.max_wait_ms / 1000
+    while True:
+        waiters = _wait_for_appends(fetch_topics) if request.max_wait_ms > 0 else []
+        try:
+            responses = await run_blocking(_handle_fetch_topics, fetch_topics, request.max_bytes)
+            if incremental:
+                responses = session.filter_incremental(responses)
+            timeout = deadline - loop.time()
+            if not waiters or timeout <= 0 or _is_fetch_satisfied(responses, request.min_bytes):
+                break
+            await asyncio.wait(waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for waiter in waiters:
+                waiter.cancel()
+
+    if session is not None:
+        session.rotate(responses)
     return FetchResponse(
         header=ResponseHeader.from_request_header(request.header),
         throttle_time_ms=0,
         error_code=ErrorCode.NONE,
-        session_id=0,
-        responses=[_handle_fetch_topic(fetch_topic) for fetch_topic in request.topics],
+        session_id=INVALID_SESSION_ID if session is None else session.session_id,
+        responses=responses,
+    )
+
+
+def _fetch_error_response(request: FetchRequest, error_code: ErrorCode) -> FetchResponse:
+    return FetchResponse(
+        header=ResponseHeader.from_request_header(request.header),
+        throttle_time_ms=0,
+        error_code=error_code,
+        session_id=INVALID_SESSION_ID,
+        responses=[],
     )
 
 
-def _handle_fetch_topic(fetch_topic: FetchTopic) -> FetchableTopicResponse:
+def _wait_for_appends(fetch_topics: list[FetchTopic]) -> list[asyncio.Future[None]]:
     cluster_metadata = ClusterMetadata()
+    waiters = []
+    for fetch_topic in fetch_topics:
+        if (topic_name := cluster_metadata.get_topic_name(fetch_topic.topic_id)) is None:
+            continue
+        for fetch_partition in fetch_topic.partitions:
+            if cluster_metadata.get_partition(fetch_topic.topic_id, fetch_partition.partition) is not None:
+                waiters.append(get_log_appender(topic_name, fetch_partition.partition).wait_for_append())
+    return waiters
 
-    if (topic_name := cluster_metadata.get_topic_name(fetch_topic.topic_id)) is None:
-        return FetchableTopicResponse(
-            topic_id=fetch_topic.topic_id,
-            partitions=[
-                PartitionData(partition_index=0, error_code=ErrorCode.UNKNOWN_TOPIC_ID),
-            ],
-        )
 
-    return FetchableTopicResponse(
-        topic_id=fetch_topic.topic_id,
-        partitions=[
-            PartitionData(
-                partition_index=p.partition,
-                error_code=ErrorCode.NONE,
-                records=list(read_record_batches(topic_name, p.partition)),
+def _is_fetch_satisfied(responses: list[FetchableTopicResponse], min_bytes: int) -> bool:
+    size = 0
+    for response in responses:
+        for partition in response.partitions:
+            if partition.error_code != ErrorCode.NONE:
+                return True
+            if partition.records is not None:
+                size += len(partition.records)
+    return size >= min_bytes
+
+
+def _handle_fetch_topics(fetch_topics: list[FetchTopic], max_bytes: int) -> list[FetchableTopicResponse]:
+    cluster_metadata = ClusterMetadata()
+    responses = []
+    remaining_bytes = max_bytes
+    for fetch_topic in fetch_topics:
+        if (topic_name := cluster_metadata.get_topic_name(fetch_topic.topic_id)) is None:
+            responses.append(FetchableTopicResponse(
+                topic_id=fetch_topic.topic_id,
+                partitions=[
+                    PartitionData(partition_index=0, error_code=ErrorCode.UNKNOWN_TOPIC_ID),
+                ],
+            ))
+            continue
+
+        partitions = []
+        for fetch_partition in fetch_topic.partitions:
+            partition_data = _handle_fetch_partition(
+                cluster_metadata,
+                fetch_topic.topic_id,
+                topic_name,
+                fetch_partition,
+                max_size=max(min(fetch_partition.partition_max_bytes, remaining_bytes), 0),
+                min_one_batch=remaining_bytes == max_bytes,
             )
-            for p in fetch_topic.partitions
-        ],
+            if partition_data.records is not None:
+                remaining_bytes -= len(partition_data.records)
+            partitions.append(partition_data)
+        responses.append(FetchableTopicResponse(topic_id=fetch_topic.topic_id, partitions=partitions))
+    return responses
+
+
+def _handle_fetch_partition(
+    cluster_metadata: ClusterMetadata,
+    topic_id: UUID,
+    topic_name: str,
+    fetch_partition: FetchPartition,
+    max_size: int,
+    min_one_batch: bool,
+) -> PartitionData:
+    if cluster_metadata.get_partition(topic_id, fetch_partition.partition) is None:
+        return PartitionData(partition_index=fetch_partition.partition, error_code=ErrorCode.UNKNOWN_TOPIC_OR_PARTITION)
+
+    log = get_log(topic_name, fetch_partition.partition)
+    records = log.read(fetch_partition.fetch_offset, max_size, min_one_batch)
+    return PartitionData(
+        partition_index=fetch_partition.partition,
+        error_code=ErrorCode.NONE,
+        high_watermark=log.log_end_offset,
+        last_stable_offset=log.log_end_offset,
+        log_start_offset=log.log_start_offset,
+        records=records,
     )
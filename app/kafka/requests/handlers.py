@@ -0,0 +1,40 @@
+import functools
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+from ..protocol import *
+from .request import Request
+from .response import Response
+
+type RequestHandler = Callable[[Any], Response | None | Awaitable[Response | None]]
+
+
+@dataclass(frozen=True)
+class ApiHandler:
+    request_class: type[Request]
+    handle: RequestHandler
+    min_version: int
+    max_version: int
+
+
+@functools.cache
+def get_api_handlers() -> dict[ApiKey, ApiHandler]:
+    from .api_versions import ApiVersionsRequest, handle_api_versions_request, register_api_versions
+    from .describe_topic_partitions import DescribeTopicPartitionsRequest, handle_describe_topic_partitions_request
+    from .fetch import FetchRequest, handle_fetch_request
+    from .list_offsets import ListOffsetsRequest, handle_list_offsets_request
+    from .metadata import MetadataRequest, handle_metadata_request
+    from .produce import ProduceRequest, handle_produce_request
+
+    api_handlers = {
+        ApiKey.PRODUCE: ApiHandler(ProduceRequest, handle_produce_request, min_version=9, max_version=11),
+        ApiKey.FETCH: ApiHandler(FetchRequest, handle_fetch_request, min_version=16, max_version=16),
+        ApiKey.LIST_OFFSETS: ApiHandler(ListOffsetsRequest, handle_list_offsets_request, min_version=6, max_version=7),
+        ApiKey.METADATA: ApiHandler(MetadataRequest, handle_metadata_request, min_version=12, max_version=12),
+        ApiKey.API_VERSIONS: ApiHandler(ApiVersionsRequest, handle_api_versions_request, min_version=4, max_version=4),
+        ApiKey.DESCRIBE_TOPIC_PARTITIONS: ApiHandler(
+            DescribeTopicPartitionsRequest, handle_describe_topic_partitions_request, min_version=0, max_version=0
+        ),
+    }
+    register_api_versions(api_handlers)
+    return api_handlers
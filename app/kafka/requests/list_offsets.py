@@ -0,0 +1,157 @@
+from dataclasses import dataclass
+from typing import Self
+
+from ..executor import run_blocking
+from ..log import get_log
+from ..metadata import ClusterMetadata
+from ..protocol import *
+from .request import Request, RequestHeader
+from .response import Response, ResponseHeader
+
+LATEST_TIMESTAMP = -1
+EARLIEST_TIMESTAMP = -2
+MAX_TIMESTAMP = -3
+MAX_TIMESTAMP_MIN_VERSION = 7
+UNKNOWN_OFFSET = -1
+UNKNOWN_TIMESTAMP = -1
+
+
+@dataclass(frozen=True)
+class ListOffsetsPartition:
+    partition_index: int
+    current_leader_epoch: int
+    timestamp: int
+
+    @classmethod
+    def decode(cls, readable: Readable) -> Self:
+        partition = cls(
+            partition_index=decode_int32(readable),
+            current_leader_epoch=decode_int32(readable),
+            timestamp=decode_int64(readable),
+        )
+        decode_tagged_fields(readable)
+        return partition
+
+
+@dataclass(frozen=True)
+class ListOffsetsTopic:
+    name: str
+    partitions: list[ListOffsetsPartition]
+
+    @classmethod
+    def decode(cls, readable: Readable) -> Self:
+        topic = cls(
+            name=decode_compact_string(readable),
+            partitions=decode_compact_array(readable, ListOffsetsPartition.decode),
+        )
+        decode_tagged_fields(readable)
+        return topic
+
+
+@dataclass(frozen=True)
+class ListOffsetsRequest(Request):
+    replica_id: int
+    isolation_level: int
+    topics: list[ListOffsetsTopic]
+
+    @classmethod
+    def decode_body(cls, header: RequestHeader, readable: Readable) -> Self:
+        request = cls(
+            header=header,
+            replica_id=decode_int32(readable),
+            isolation_level=decode_int8(readable),
+            topics=decode_compact_array(readable, ListOffsetsTopic.decode),
+        )
+        decode_tagged_fields(readable)
+        return request
+
+
+@dataclass(frozen=True)
+class ListOffsetsPartitionResponse:
+    partition_index: int
+    error_code: ErrorCode
+    timestamp: int = UNKNOWN_TIMESTAMP
+    offset: int = UNKNOWN_OFFSET
+    leader_epoch: int = -1
+
+    def encode(self, writable: Writable) -> None:
+        encode_int32(writable, self.partition_index)
+        self.error_code.encode(writable)
+        encode_int64(writable, self.timestamp)
+        encode_int64(writable, self.offset)
+        encode_int32(writable, self.leader_epoch)
+        encode_tagged_fields(writable)
+
+
+@dataclass(frozen=True)
+class ListOffsetsTopicResponse:
+    name: str
+    partitions: list[ListOffsetsPartitionResponse]
+
+    def encode(self, writable: Writable) -> None:
+        encode_compact_string(writable, self.name)
+        encode_compact_array(writable, self.partitions)
+        encode_tagged_fields(writable)
+
+
+@dataclass(frozen=True)
+class ListOffsetsResponse(Response):
+    throttle_time_ms: int
+    topics: list[ListOffsetsTopicResponse]
+
+    def _encode_body(self, writable: Writable) -> None:
+        encode_int32(writable, self.throttle_time_ms)
+        encode_compact_array(writable, self.topics)
+        encode_tagged_fields(writable)
+
+
+async def handle_list_offsets_request(request: ListOffsetsRequest) -> ListOffsetsResponse:
+    return ListOffsetsResponse(
+        header=ResponseHeader.from_request_header(request.header),
+        throttle_time_ms=0,
+        topics=await run_blocking(_handle_list_offsets_topics, request.topics, request.header.request_api_version),
+    )
+
+
+def _handle_list_offsets_topics(topics: list[ListOffsetsTopic], version: int) -> list[ListOffsetsTopicResponse]:
+    cluster_metadata = ClusterMetadata()
+    return [
+        ListOffsetsTopicResponse(
+            name=topic.name,
+            partitions=[
+                _handle_list_offsets_partition(cluster_metadata, topic.name, partition, version)
+                for partition in topic.partitions
+            ],
+        )
+        for topic in topics
+    ]
+
+
+def _handle_list_offsets_partition(
+    cluster_metadata: ClusterMetadata, topic_name: str, partition: ListOffsetsPartition, version: int
+) -> ListOffsetsPartitionResponse:
+    topic_id = cluster_metadata.get_topic_id(topic_name)
+    if topic_id is None or (state := cluster_metadata.get_partition(topic_id, partition.partition_index)) is None:
+        return ListOffsetsPartitionResponse(partition.partition_index, ErrorCode.UNKNOWN_TOPIC_OR_PARTITION)
+    if partition.timestamp == MAX_TIMESTAMP and version < MAX_TIMESTAMP_MIN_VERSION:
+        return ListOffsetsPartitionResponse(partition.partition_index, ErrorCode.UNSUPPORTED_VERSION)
+
+    log = get_log(topic_name, partition.partition_index)
+    log.refresh()
+    if partition.timestamp == LATEST_TIMESTAMP:
+        found = (UNKNOWN_TIMESTAMP, log.log_end_offset)
+    elif partition.timestamp == EARLIEST_TIMESTAMP:
+        found = (UNKNOWN_TIMESTAMP, log.log_start_offset)
+    elif partition.timestamp == MAX_TIMESTAMP:
+        found = log.find_max_timestamp()
+    else:
+        found = log.find_offset_by_timestamp(partition.timestamp)
+
+    timestamp, offset = found or (UNKNOWN_TIMESTAMP, UNKNOWN_OFFSET)
+    return ListOffsetsPartitionResponse(
+        partition_index=partition.partition_index,
+        error_code=ErrorCode.NONE,
+        timestamp=timestamp,
+        offset=offset,
+        leader_epoch=state.leader_epoch,
+    )
@@ -0,0 +1,187 @@
+from dataclasses import dataclass, field
+from typing import Self
+from uuid import UUID
+
+from ..metadata import ClusterMetadata
+from ..protocol import *
+from .request import Request, RequestHeader
+from .response import Response, ResponseHeader
+
+BROKER_ID = 1
+BROKER_HOST = "localhost"
+BROKER_PORT = 9092
+AUTHORIZED_OPERATIONS_OMITTED = -2147483648
+
+
+@dataclass(frozen=True)
+class MetadataRequestTopic:
+    topic_id: UUID
+    name: str | None
+
+    @classmethod
+    def decode(cls, readable: Readable) -> Self:
+        topic = cls(
+            topic_id=decode_uuid(readable),
+            name=decode_compact_nullable_string(readable),
+        )
+        decode_tagged_fields(readable)
+        return topic
+
+
+@dataclass(frozen=True)
+class MetadataRequest(Request):
+    topics: list[MetadataRequestTopic] | None
+    allow_auto_topic_creation: bool
+    include_topic_authorized_operations: bool
+
+    @classmethod
+    def decode_body(cls, header: RequestHeader, readable: Readable) -> Self:
+        request = cls(
+            header=header,
+            topics=decode_compact_nullable_array(readable, MetadataRequestTopic.decode),
+            allow_auto_topic_creation=decode_int8(readable) != 0,
+            include_topic_authorized_operations=decode_int8(readable) != 0,
+        )
+        decode_tagged_fields(readable)
+        return request
+
+
+@dataclass(frozen=True)
+class MetadataResponseBroker:
+    node_id: int
+    host: str
+    port: int
+    rack: str | None = None
+
+    def encode(self, writable: Writable) -> None:
+        encode_int32(writable, self.node_id)
+        encode_compact_string(writable, self.host)
+        encode_int32(writable, self.port)
+        encode_compact_nullable_string(writable, self.rack)
+        encode_tagged_fields(writable)
+
+
+@dataclass(frozen=True)
+class MetadataResponsePartition:
+    error_code: ErrorCode
+    partition_index: int
+    leader_id: int
+    leader_epoch: int
+    replica_nodes: list[int]
+    isr_nodes: list[int]
+    offline_replicas: list[int] = field(default_factory=list)
+
+    def encode(self, writable: Writable) -> None:
+        self.error_code.encode(writable)
+        encode_int32(writable, self.partition_index)
+        encode_int32(writable, self.leader_id)
+        encode_int32(writable, self.leader_epoch)
+        encode_compact_array(writable, self.replica_nodes, encode_int32)
+        encode_compact_array(writable, self.isr_nodes, encode_int32)
+        encode_compact_array(writable, self.offline_replicas, encode_int32)
+        encode_tagged_fields(writable)
+
+
+@dataclass(frozen=True)
+class MetadataResponseTopic:
+    error_code: ErrorCode
+    name: str | None
+    topic_id: UUID
+    is_internal: bool = False
+    partitions: list[MetadataResponsePartition] = field(default_factory=list)
+    topic_authorized_operations: int = AUTHORIZED_OPERATIONS_OMITTED
+
+    def encode(self, writable: Writable) -> None:
+        self.error_code.encode(writable)
+        encode_compact_nullable_string(writable, self.name)
+        encode_uuid(writable, self.topic_id)
+        encode_boolean(writable, self.is_internal)
+        encode_compact_array(writable, self.partitions)
+        encode_int32(writable, self.topic_authorized_operations)
+        encode_tagged_fields(writable)
+
+
+@dataclass(frozen=True)
+class MetadataResponse(Response):
+    throttle_time_ms: int
+    brokers: list[MetadataResponseBroker]
+    cluster_id: str | None
+    controller_id: int
+    encoded_topics: list[bytes]
+
+    def _encode_body(self, writable: Writable) -> None:
+        encode_int32(writable, self.throttle_time_ms)
+        encode_compact_array(writable, self.brokers)
+        encode_compact_nullable_string(writable, self.cluster_id)
+        encode_int32(writable, self.controller_id)
+        encode_compact_array(writable, self.encoded_topics, ByteWriter.write)
+        encode_tagged_fields(writable)
+
+
+_encoded_topics: dict[UUID, tuple[int, bytes]] = {}
+
+
+def handle_metadata_request(request: MetadataRequest) -> MetadataResponse:
+    cluster_metadata = ClusterMetadata()
+    if request.topics is None:
+        encoded_topics = [
+            _encode_topic(cluster_metadata, cluster_metadata.get_topic_id(topic_name))
+            for topic_name in cluster_metadata.get_topic_names()
+        ]
+    else:
+        encoded_topics = [_handle_request_topic(cluster_metadata, topic) for topic in request.topics]
+
+    return MetadataResponse(
+        header=ResponseHeader.from_request_header(request.header),
+        throttle_time_ms=0,
+        brokers=[MetadataResponseBroker(BROKER_ID, BROKER_HOST, BROKER_PORT)],
+        cluster_id=None,
+        controller_id=BROKER_ID,
+        encoded_topics=encoded_topics,
+    )
+
+
+def _handle_request_topic(cluster_metadata: ClusterMetadata, topic: MetadataRequestTopic) -> bytes:
+    if topic.name is not None:
+        if (topic_id := cluster_metadata.get_topic_id(topic.name)) is None:
+            return _encode_error_topic(ErrorCode.UNKNOWN_TOPIC_OR_PARTITION, topic.name, UUID(int=0))
+        return _encode_topic(cluster_metadata, topic_id)
+
+    if cluster_metadata.get_topic_name(topic.topic_id) is None:
+        return _encode_error_topic(ErrorCode.UNKNOWN_TOPIC_ID, None, topic.topic_id)
+    return _encode_topic(cluster_metadata, topic.topic_id)
+
+
+def _encode_error_topic(error_code: ErrorCode, name: str | None, topic_id: UUID) -> bytes:
+    writable = ByteWriter()
+    MetadataResponseTopic(error_code=error_code, name=name, topic_id=topic_id).encode(writable)
+    return writable.getvalue()
+
+
+def _encode_topic(cluster_metadata: ClusterMetadata, topic_id: UUID) -> bytes:
+    version = cluster_metadata.get_topic_version(topic_id)
+    if (cached := _encoded_topics.get(topic_id)) is not None and cached[0] == version:
+        return cached[1]
+
+    partitions = []
+    for partition_index in cluster_metadata.get_topic_partitions(topic_id) or []:
+        if (partition := cluster_metadata.get_partition(topic_id, partition_index)) is None:
+            continue
+        partitions.append(MetadataResponsePartition(
+            error_code=ErrorCode.NONE,
+            partition_index=partition_index,
+            leader_id=partition.leader,
+            leader_epoch=partition.leader_epoch,
+            replica_nodes=partition.replicas,
+            isr_nodes=partition.isr,
+        ))
+    writable = ByteWriter()
+    MetadataResponseTopic(
+        error_code=ErrorCode.NONE,
+        name=cluster_metadata.get_topic_name(topic_id),
+        topic_id=topic_id,
+        partitions=partitions,
+    ).encode(writable)
+    encoded_topic = writable.getvalue()
+    _encoded_topics[topic_id] = (version, encoded_topic)
+    return encoded_topic
@@ -0,0 +1,190 @@
+import asyncio
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Self
+
+from ..log import CorruptRecordError, UnsupportedCompressionError, get_log, get_log_appender
+from ..metadata import ClusterMetadata
+from ..protocol import *
+from .request import Request, RequestHeader
+from .response import Response, ResponseHeader
+
+
+@dataclass(frozen=True)
+class PartitionProduceData:
+    index: int
+    records: memoryview | None
+
+    @classmethod
+    def decode(cls, readable: Readable) -> Self:
+        partition_produce_data = cls(
+            index=decode_int32(readable),
+            records=decode_compact_nullable_bytes(readable),
+        )
+        decode_tagged_fields(readable)
+        return partition_produce_data
+
+
+@dataclass(frozen=True)
+class TopicProduceData:
+    name: str
+    partition_data: list[PartitionProduceData]
+
+    @classmethod
+    def decode(cls, readable: Readable) -> Self:
+        topic_produce_data = cls(
+            name=decode_compact_string(readable),
+            partition_data=decode_compact_array(readable, PartitionProduceData.decode),
+        )
+        decode_tagged_fields(readable)
+        return topic_produce_data
+
+
+_PRODUCE_REQUEST_SCHEMA = Schema(
+    ("transactional_id", decode_compact_nullable_string),
+    ("acks", INT16),
+    ("timeout_ms", INT32),
+    ("topic_data", partial(decode_compact_array, decode_function=TopicProduceData.decode)),
+)
+
+
+@dataclass(frozen=True)
+class ProduceRequest(Request):
+    transactional_id: str | None
+    acks: int
+    timeout_ms: int
+    topic_data: list[TopicProduceData]
+
+    @classmethod
+    def decode_body(cls, header: RequestHeader, readable: Readable) -> Self:
+        request = cls(header, *_PRODUCE_REQUEST_SCHEMA.decode(readable))
+        decode_tagged_fields(readable)
+        return request
+
+
+_PARTITION_PRODUCE_RESPONSE_SCHEMA = Schema(
+    ("index", INT32),
+    ("error_code", INT16),
+    ("base_offset", INT64),
+    ("log_append_time_ms", INT64),
+    ("log_start_offset", INT64),
+    ("record_errors", None, encode_compact_array),
+    ("error_message", None, encode_compact_nullable_string),
+)
+
+
+@dataclass(frozen=True)
+class PartitionProduceResponse:
+    index: int
+    error_code: ErrorCode
+    base_offset: int = -1
+    log_append_time_ms: int = -1
+    log_start_offset: int = -1
+    record_errors: list = field(default_factory=list)
+    error_message: str | None = None
+
+    def encode(self, writable: Writable) -> None:
+        _PARTITION_PRODUCE_RESPONSE_SCHEMA.encode(writable, self)
+        encode_tagged_fields(writable)
+
+
+@dataclass(frozen=True)
+class TopicProduceResponse:
+    name: str
+    partition_responses: list[PartitionProduceResponse]
+
+    def encode(self, writable: Writable) -> None:
+        encode_compact_string(writable, self.name)
+        encode_compact_array(writable, self.partition_responses)
+        encode_tagged_fields(writable)
+
+
+@dataclass(frozen=True)
+class ProduceResponse(Response):
+    responses: list[TopicProduceResponse]
+    throttle_time_ms: int
+
+    def _encode_body(self, writable: Writable) -> None:
+        encode_compact_array(writable, self.responses)
+        encode_int32(writable, self.throttle_time_ms)
+        encode_tagged_fields(writable)
+
+
+async def handle_produce_request(request: ProduceRequest) -> ProduceResponse | None:
+    if request.acks not in (-1, 0, 1):
+        return ProduceResponse(
+            header=ResponseHeader.from_request_header(request.header),
+            responses=[
+                TopicProduceResponse(
+                    name=topic_data.name,
+                    partition_responses=[
+                        PartitionProduceResponse(index=p.index, error_code=ErrorCode.INVALID_REQUIRED_ACKS)
+                        for p in topic_data.partition_data
+                    ],
+                )
+                for topic_data in request.topic_data
+            ],
+            throttle_time_ms=0,
+        )
+
+    cluster_metadata = ClusterMetadata()
+    pending = [
+        [_submit_partition(cluster_metadata, topic_data.name, p, request.acks) for p in topic_data.partition_data]
+        for topic_data in request.topic_data
+    ]
+    if request.acks == 0:
+        return None
+
+    return ProduceResponse(
+        header=ResponseHeader.from_request_header(request.header),
+        responses=[
+            TopicProduceResponse(
+                name=topic_data.name,
+                partition_responses=[
+                    await _await_partition(topic_data.name, p, result)
+                    for p, result in zip(topic_data.partition_data, results)
+                ],
+            )
+            for topic_data, results in zip(request.topic_data, pending)
+        ],
+        throttle_time_ms=0,
+    )
+
+
+def _submit_partition(
+    cluster_metadata: ClusterMetadata, topic_name: str, partition_data: PartitionProduceData, acks: int
+) -> asyncio.Future[int] | ErrorCode | None:
+    if (topic_id := cluster_metadata.get_topic_id(topic_name)) is None:
+        return ErrorCode.UNKNOWN_TOPIC_OR_PARTITION
+    if cluster_metadata.get_partition(topic_id, partition_data.index) is None:
+        return ErrorCode.UNKNOWN_TOPIC_OR_PARTITION
+
+    try:
+        return get_log_appender(topic_name, partition_data.index).submit(partition_data.records or b"", acks)
+    except CorruptRecordError:
+        return ErrorCode.CORRUPT_MESSAGE
+    except UnsupportedCompressionError:
+        return ErrorCode.UNSUPPORTED_COMPRESSION_TYPE
+
+
+async def _await_partition(
+    topic_name: str, partition_data: PartitionProduceData, result: asyncio.Future[int] | ErrorCode
+) -> PartitionProduceResponse:
+    if isinstance(result, ErrorCode):
+        return PartitionProduceResponse(index=partition_data.index, error_code=result)
+
+    try:
+        base_offset = await result
+    except CorruptRecordError:
+        return PartitionProduceResponse(index=partition_data.index, error_code=ErrorCode.CORRUPT_MESSAGE)
+    except UnsupportedCompressionError:
+        return PartitionProduceResponse(index=partition_data.index, error_code=ErrorCode.UNSUPPORTED_COMPRESSION_TYPE)
+    except OSError:
+        return PartitionProduceResponse(index=partition_data.index, error_code=ErrorCode.KAFKA_STORAGE_ERROR)
+
+    return PartitionProduceResponse(
+        index=partition_data.index,
+        error_code=ErrorCode.NONE,
+        base_offset=base_offset,
+        log_start_offset=get_log(topic_name, partition_data.index).log_start_offset,
+    )
@@ -5,6 +5,14 @@ from typing import Self
 from ..protocol import *
 
 
+_REQUEST_HEADER_SCHEMA = Schema(
+    ("request_api_key", INT16),
+    ("request_api_version", INT16),
+    ("correlation_id", INT32),
+    ("client_id", decode_nullable_string),
+)
+
+
 @dataclass(frozen=True)
 class RequestHeader:
     request_api_key: ApiKey
@@ -14,12 +22,8 @@ class RequestHeader:
 
     @classmethod
     def decode(cls, readable: Readable) -> Self:
-        request_header = cls(
-            request_api_key=ApiKey.decode(readable),
-            request_api_version=decode_int16(readable),
-            correlation_id=decode_int32(readable),
-            client_id=decode_nullable_string(readable),
-        )
+        request_api_key, request_api_version, correlation_id, client_id = _REQUEST_HEADER_SCHEMA.decode(readable)
+        request_header = cls(ApiKey(request_api_key), request_api_version, correlation_id, client_id)
         decode_tagged_fields(readable)
         return request_header
 
@@ -35,17 +39,7 @@ class Request(ABC):
 
 
 def decode_request(readable: Readable) -> Request:
-    header = RequestHeader.decode(readable)
+    from .handlers import get_api_handlers
 
-    match header.request_api_key:
-        case ApiKey.FETCH:
-            from .fetch import FetchRequest
-            request_class = FetchRequest
-        case ApiKey.API_VERSIONS:
-            from .api_versions import ApiVersionsRequest
-            request_class = ApiVersionsRequest
-        case ApiKey.DESCRIBE_TOPIC_PARTITIONS:
-            from .describe_topic_partitions import DescribeTopicPartitionsRequest
-            request_class = DescribeTopicPartitionsRequest
-
-    return request_class.decode_body(header, readable)
+    header = RequestHeader.decode(readable)
+    return get_api_handlers()[header.request_api_key].request_class.decode_body(header, readable)
@@ -1,3 +1,4 @@
+import inspect
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from typing import Literal, Self
@@ -10,11 +11,10 @@ from .request import Request, RequestHeader
 class ResponseHeader:
     correlation_id: int
 
-    def encode(self, version: Literal[0, 1]) -> bytes:
-        data = encode_int32(self.correlation_id)
+    def encode(self, writable: Writable, version: Literal[0, 1]) -> None:
+        encode_int32(writable, self.correlation_id)
         if version == 1:
-            data += encode_tagged_fields()
-        return data
+            encode_tagged_fields(writable)
 
     @classmethod
     def from_request_header(cls, request_header: RequestHeader) -> Self:
@@ -25,28 +25,36 @@ class ResponseHeader:
 class Response(ABC):
     header: ResponseHeader
 
-    def encode(self) -> bytes:
-        return self._encode_header() + self._encode_body()
+    def encode(self, writable: Writable) -> None:
+        self._encode_header(writable)
+        self._encode_body(writable)
 
-    def _encode_header(self) -> bytes:
-        return self.header.encode(version=1)
+    def _encode_header(self, writable: Writable) -> None:
+        self.header.encode(writable, version=1)
 
     @abstractmethod
-    def _encode_body(self) -> bytes:
+    def _encode_body(self, writable: Writable) -> None:
         raise NotImplementedError
 
 
-def handle_request(request: Request) -> Response:
-    match request.header.request_api_key:
-        case ApiKey.FETCH:
-            from .fetch import FetchRequest, handle_fetch_request
-            request_class, request_handler = FetchRequest, handle_fetch_request
-        case ApiKey.API_VERSIONS:
-            from .api_versions import ApiVersionsRequest, handle_api_versions_request
-            request_class, request_handler = ApiVersionsRequest, handle_api_versions_request
-        case ApiKey.DESCRIBE_TOPIC_PARTITIONS:
-            from .describe_topic_partitions import DescribeTopicPartitionsRequest, handle_describe_topic_partitions_request
-            request_class, request_handler = DescribeTopicPartitionsRequest, handle_describe_topic_partitions_request
-
-    assert isinstance(request, request_class)
-    return request_handler(request)
+@dataclass(frozen=True)
+class EncodedResponse(Response):
+    body: bytes
+    header_version: Literal[0, 1] = 1
+
+    def _encode_header(self, writable: Writable) -> None:
+        self.header.encode(writable, version=self.header_version)
+
+    def _encode_body(self, writable: Writable) -> None:
+        writable.write(self.body)
+
+
+async def handle_request(request: Request) -> Response | None:
+    from .handlers import get_api_handlers
+
+    api_handler = get_api_handlers()[request.header.request_api_key]
+    assert isinstance(request, api_handler.request_class)
+    response = api_handler.handle(request)
+    if inspect.isawaitable(response):
+        response = await response
+    return response
@@ -1,9 +1,35 @@
+import argparse
 import asyncio
+import logging
+import os
+import signal
+import sys
 from asyncio import StreamReader, StreamWriter
-from io import BytesIO
 from typing import Self
 
-from .kafka.requests import Request, Response, decode_request, handle_request
+from .kafka.executor import configure_io_executor, run_blocking
+from .kafka.log import (
+    CRC32C_IMPLEMENTATION,
+    CrcCheckPolicy,
+    FileRecords,
+    LogConfig,
+    MemoryRecords,
+    configure_logs,
+    configure_segment_maps,
+    recover_logs,
+)
+from .kafka.metadata import ClusterMetadata
+from .kafka.protocol import INT32, ByteReader, ByteWriter
+from .kafka.requests import (
+    Request,
+    Response,
+    configure_fetch_sessions,
+    decode_request,
+    get_api_handlers,
+    handle_request,
+)
+
+logger = logging.getLogger(__name__)
 
 
 class KafkaClientConnection:
@@ -13,12 +39,19 @@ class KafkaClientConnection:
 
     async def recv_request(self) -> Request:
         message_size = int.from_bytes(await self._reader.readexactly(4))
-        readable = BytesIO(await self._reader.readexactly(message_size))
+        readable = ByteReader(await self._reader.readexactly(message_size))
         return decode_request(readable)
 
     async def send_response(self, response: Response) -> None:
-        data = response.encode()
-        self._writer.write(len(data).to_bytes(4) + data)
+        writable = ByteWriter()
+        writable.pack(INT32, 0)
+        response.encode(writable)
+        writable.patch(INT32, 0, len(writable) - 4)
+        for part in writable.parts():
+            if isinstance(part, (FileRecords, MemoryRecords)):
+                await part.send(self._writer)
+            else:
+                self._writer.write(part)
         await self._writer.drain()
 
     async def __aenter__(self) -> Self:
@@ -30,18 +63,137 @@ class KafkaClientConnection:
 
 
 class KafkaServer:
+    def __init__(
+        self,
+        max_in_flight_requests: int = 5,
+        metadata_poll_interval_ms: int = 500,
+        metadata_snapshot_records: int = 10000,
+    ) -> None:
+        self._max_in_flight_requests = max_in_flight_requests
+        self._metadata_poll_interval_ms = metadata_poll_interval_ms
+        self._metadata_snapshot_records = metadata_snapshot_records
+
     async def start(self) -> None:
+        cluster_metadata = await run_blocking(ClusterMetadata)
         server = await asyncio.start_server(self._client_connected_cb, host="localhost", port=9092, reuse_port=True)
-        async with server:
+        async with server, asyncio.TaskGroup() as task_group:
+            task_group.create_task(self._poll_metadata(cluster_metadata))
             await server.serve_forever()
 
+    async def _poll_metadata(self, cluster_metadata: ClusterMetadata) -> None:
+        while True:
+            await asyncio.sleep(self._metadata_poll_interval_ms / 1000)
+            try:
+                await run_blocking(cluster_metadata.update)
+                await run_blocking(cluster_metadata.maybe_write_snapshot, self._metadata_snapshot_records)
+            except Exception:
+                logger.exception("failed to poll cluster metadata")
+
     async def _client_connected_cb(self, reader: StreamReader, writer: StreamWriter) -> None:
         async with KafkaClientConnection(reader, writer) as connection:
+            in_flight = asyncio.Queue[asyncio.Task[Response | None] | None]()
+            slots = asyncio.Semaphore(self._max_in_flight_requests)
+            async with asyncio.TaskGroup() as task_group:
+                task_group.create_task(self._recv_requests(connection, in_flight, slots))
+                task_group.create_task(self._send_responses(connection, in_flight, slots))
+
+    async def _recv_requests(
+        self,
+        connection: KafkaClientConnection,
+        in_flight: asyncio.Queue[asyncio.Task[Response | None] | None],
+        slots: asyncio.Semaphore,
+    ) -> None:
+        try:
             while True:
                 request = await connection.recv_request()
-                response = handle_request(request)
-                await connection.send_response(response)
+                await slots.acquire()
+                in_flight.put_nowait(asyncio.create_task(handle_request(request)))
+        except asyncio.IncompleteReadError:
+            in_flight.put_nowait(None)
+
+    async def _send_responses(
+        self,
+        connection: KafkaClientConnection,
+        in_flight: asyncio.Queue[asyncio.Task[Response | None] | None],
+        slots: asyncio.Semaphore,
+    ) -> None:
+        while (task := await in_flight.get()) is not None:
+            try:
+                response = await task
+                if response is not None:
+                    await connection.send_response(response)
+            finally:
+                slots.release()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("properties", nargs="?")
+    parser.add_argument("--segment-bytes", type=int, default=LogConfig.segment_bytes)
+    parser.add_argument("--linger-ms", type=int, default=LogConfig.linger_ms)
+    parser.add_argument("--crc-check", type=CrcCheckPolicy, choices=list(CrcCheckPolicy), default=LogConfig.crc_check)
+    parser.add_argument("--max-in-flight-requests", type=int, default=5)
+    parser.add_argument("--io-threads", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--recovery-processes", type=int, default=None)
+    parser.add_argument("--metadata-poll-ms", type=int, default=500)
+    parser.add_argument("--metadata-snapshot-records", type=int, default=10000)
+    parser.add_argument("--max-fetch-sessions", type=int, default=1000)
+    parser.add_argument("--mmap-segments", type=int, default=0)
+    return parser.parse_args()
+
+
+def serve(args: argparse.Namespace) -> None:
+    configure_io_executor(args.io_threads)
+    configure_fetch_sessions(args.max_fetch_sessions)
+    configure_segment_maps(args.mmap_segments)
+    get_api_handlers()
+    server = KafkaServer(
+        max_in_flight_requests=args.max_in_flight_requests,
+        metadata_poll_interval_ms=args.metadata_poll_ms,
+        metadata_snapshot_records=args.metadata_snapshot_records,
+    )
+    asyncio.run(server.start())
+
+
+def serve_workers(args: argparse.Namespace) -> None:
+    ClusterMetadata()
+
+    worker_pids = []
+    for _ in range(args.workers):
+        if (pid := os.fork()) == 0:
+            try:
+                serve(args)
+            finally:
+                os._exit(0)
+        worker_pids.append(pid)
+
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        os.wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for pid in worker_pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in worker_pids:
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
 
 
 if __name__ == "__main__":
-    asyncio.run(KafkaServer().start())
+    args = parse_args()
+    logging.basicConfig(level=logging.INFO)
+    log_config = LogConfig(segment_bytes=args.segment_bytes, linger_ms=args.linger_ms, crc_check=args.crc_check)
+    logger.info("crc32c implementation: %s, crc check: %s", CRC32C_IMPLEMENTATION, log_config.crc_check)
+    configure_logs(log_config)
+    recover_logs(log_config, args.recovery_processes)
+    if args.workers > 1:
+        serve_workers(args)
+    else:
+        serve(args)
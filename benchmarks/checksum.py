@@ -0,0 +1,37 @@
+import argparse
+import os
+import time
+from typing import Callable
+
+from app.kafka.log import checksum
+
+
+def throughput(function: Callable[[bytes], int], data: bytes, total_bytes: int) -> float:
+    number = max(total_bytes // len(data), 1)
+    start = time.perf_counter()
+    for _ in range(number):
+        function(data)
+    return len(data) * number / (time.perf_counter() - start) / 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[256, 4096, 65536, 1 << 20])
+    parser.add_argument("--total-bytes", type=int, default=8 << 20)
+    args = parser.parse_args()
+
+    cases = [
+        ("table", checksum._crc32c_table),
+        ("fold", checksum._crc32c_fold),
+        ("crc32c", checksum.crc32c),
+    ]
+    print(f"{'bytes':>10}" + "".join(f"{name + ' MB/s':>14}" for name, _ in cases))
+    for size in args.sizes:
+        data = os.urandom(size)
+        assert len({function(data) for _, function in cases}) == 1
+        total_bytes = args.total_bytes // 8 if size < checksum.TABLE_THRESHOLD_BYTES else args.total_bytes
+        print(f"{size:>10}" + "".join(f"{throughput(function, data, total_bytes):>14.1f}" for _, function in cases))
+
+
+if __name__ == "__main__":
+    main()
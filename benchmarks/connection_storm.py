@@ -0,0 +1,135 @@
+import argparse
+import asyncio
+import contextlib
+import statistics
+import subprocess
+import sys
+import time
+import timeit
+
+from app.kafka.protocol import *
+from app.kafka.requests.api_versions import (
+    ApiVersion,
+    ApiVersionsRequest,
+    ApiVersionsResponse,
+    handle_api_versions_request,
+)
+from app.kafka.requests.handlers import get_api_handlers
+from app.kafka.requests.request import RequestHeader
+from app.kafka.requests.response import ResponseHeader
+
+HOST = "localhost"
+PORT = 9092
+
+
+def encode_api_versions_request(correlation_id: int) -> bytes:
+    writable = ByteWriter()
+    encode_int32(writable, 0)
+    encode_int16(writable, ApiKey.API_VERSIONS)
+    encode_int16(writable, 4)
+    encode_int32(writable, correlation_id)
+    encode_int16(writable, 5)
+    writable.write(b"storm")
+    encode_tagged_fields(writable)
+    encode_compact_string(writable, "storm")
+    encode_compact_string(writable, "1.0")
+    encode_tagged_fields(writable)
+    writable.patch(INT32, 0, len(writable) - 4)
+    return writable.getvalue()
+
+
+def build_uncached_response(request: ApiVersionsRequest) -> ApiVersionsResponse:
+    return ApiVersionsResponse(
+        header=ResponseHeader.from_request_header(request.header),
+        error_code=ErrorCode.NONE,
+        api_keys=[
+            ApiVersion(api_key, api_handler.min_version, api_handler.max_version)
+            for api_key, api_handler in sorted(get_api_handlers().items())
+        ],
+        throttle_time_ms=0,
+    )
+
+
+def bench_handler(number: int) -> None:
+    request = ApiVersionsRequest(RequestHeader(ApiKey.API_VERSIONS, 4, 7, "storm"), "storm", "1.0")
+
+    def uncached() -> None:
+        build_uncached_response(request).encode(ByteWriter())
+
+    def cached() -> None:
+        handle_api_versions_request(request).encode(ByteWriter())
+
+    uncached_ns = timeit.timeit(uncached, number=number) / number * 1e9
+    cached_ns = timeit.timeit(cached, number=number) / number * 1e9
+    print(f"handler+encode: rebuilt {uncached_ns:.0f} ns, pre-encoded {cached_ns:.0f} ns ({uncached_ns / cached_ns:.2f}x)")
+
+
+async def handshake(correlation_id: int) -> float:
+    start = time.perf_counter()
+    reader, writer = await asyncio.open_connection(HOST, PORT)
+    try:
+        writer.write(encode_api_versions_request(correlation_id))
+        await writer.drain()
+        size = int.from_bytes(await reader.readexactly(4))
+        response = await reader.readexactly(size)
+        assert int.from_bytes(response[:4]) == correlation_id
+    finally:
+        writer.close()
+        await writer.wait_closed()
+    return time.perf_counter() - start
+
+
+async def storm(connections: int, concurrency: int) -> None:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited(correlation_id: int) -> float:
+        async with semaphore:
+            return await handshake(correlation_id)
+
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(limited(i) for i in range(connections)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    print(
+        f"{connections} handshakes with concurrency {concurrency}: {connections / elapsed:.0f}/s, "
+        f"p50 {statistics.median(latencies) * 1e3:.2f} ms, p99 {latencies[int(len(latencies) * 0.99)] * 1e3:.2f} ms"
+    )
+
+
+async def wait_for_server(timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection(HOST, PORT)
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.05)
+        else:
+            writer.close()
+            await writer.wait_closed()
+            return
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--connections", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--number", type=int, default=50_000)
+    parser.add_argument("--external-server", action="store_true")
+    parser.add_argument("server_args", nargs=argparse.REMAINDER)
+    args = parser.parse_args()
+
+    bench_handler(args.number)
+
+    with contextlib.ExitStack() as stack:
+        if not args.external_server:
+            server = subprocess.Popen([sys.executable, "-m", "app.main", *args.server_args])
+            stack.callback(server.wait)
+            stack.callback(server.terminate)
+        asyncio.run(wait_for_server(timeout=10))
+        asyncio.run(storm(args.connections, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+import argparse
+import timeit
+from typing import Callable
+
+from app.kafka.metadata.record import DefaultRecord
+from app.kafka.metadata.record_batch import DefaultRecordBatch
+from app.kafka.protocol import *
+from app.kafka.requests.fetch import FetchPartition
+from app.kafka.requests.request import RequestHeader
+
+
+def decode_request_header_per_field(readable: Readable) -> RequestHeader:
+    request_header = RequestHeader(
+        request_api_key=ApiKey.decode(readable),
+        request_api_version=decode_int16(readable),
+        correlation_id=decode_int32(readable),
+        client_id=decode_nullable_string(readable),
+    )
+    decode_tagged_fields(readable)
+    return request_header
+
+
+def decode_fetch_partition_per_field(readable: Readable) -> FetchPartition:
+    fetch_partition = FetchPartition(
+        partition=decode_int32(readable),
+        current_leader_epoch=decode_int32(readable),
+        fetch_offset=decode_int64(readable),
+        last_fetched_epoch=decode_int32(readable),
+        log_start_offset=decode_int64(readable),
+        partition_max_bytes=decode_int32(readable),
+    )
+    decode_tagged_fields(readable)
+    return fetch_partition
+
+
+def decode_record_batch_per_field(readable: Readable) -> DefaultRecordBatch:
+    base_offset = decode_int64(readable)
+    new_readable = ByteReader(readable.read(decode_int32(readable)))
+    return DefaultRecordBatch(
+        base_offset=base_offset,
+        partition_leader_epoch=decode_int32(new_readable),
+        magic=decode_int8(new_readable),
+        crc=decode_uint32(new_readable),
+        attributes=decode_int16(new_readable),
+        last_offset_delta=decode_int32(new_readable),
+        base_timestamp=decode_int64(new_readable),
+        max_timestamp=decode_int64(new_readable),
+        producer_id=decode_int64(new_readable),
+        producer_epoch=decode_int16(new_readable),
+        base_sequence=decode_int32(new_readable),
+        records_count=decode_int32(new_readable),
+        records_data=new_readable.read(len(new_readable)),
+    )
+
+
+def decode_record_batch_records(readable: Readable) -> list[DefaultRecord]:
+    return list(DefaultRecordBatch.decode(readable).records)
+
+
+def encode_samples() -> dict[str, bytes]:
+    samples = {}
+
+    writable = ByteWriter()
+    encode_int16(writable, ApiKey.FETCH)
+    encode_int16(writable, 16)
+    encode_int32(writable, 7)
+    encode_int16(writable, 16)
+    writable.write(b"benchmark-client")
+    encode_tagged_fields(writable)
+    samples["RequestHeader"] = writable.getvalue()
+
+    writable = ByteWriter()
+    encode_int32(writable, 0)
+    encode_int32(writable, -1)
+    encode_int64(writable, 1234)
+    encode_int32(writable, -1)
+    encode_int64(writable, -1)
+    encode_int32(writable, 1048576)
+    encode_tagged_fields(writable)
+    samples["FetchPartition"] = writable.getvalue()
+
+    records = ByteWriter()
+    for i in range(3):
+        DefaultRecord(0, i, i, None, b"x" * 16, []).encode(records)
+    writable = ByteWriter()
+    DefaultRecordBatch(
+        base_offset=0,
+        partition_leader_epoch=0,
+        magic=2,
+        crc=0,
+        attributes=0,
+        last_offset_delta=2,
+        base_timestamp=1700000000000,
+        max_timestamp=1700000000002,
+        producer_id=-1,
+        producer_epoch=-1,
+        base_sequence=-1,
+        records_count=3,
+        records_data=memoryview(records.getvalue()),
+    ).encode(writable)
+    samples["RecordBatch"] = writable.getvalue()
+    return samples
+
+
+def bench(function: Callable[[Readable], object], data: bytes, number: int) -> float:
+    seconds = timeit.timeit(lambda: function(ByteReader(data)), number=number)
+    return seconds / number * 1e9
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=200_000)
+    args = parser.parse_args()
+
+    samples = encode_samples()
+    cases = [
+        ("RequestHeader", decode_request_header_per_field, RequestHeader.decode),
+        ("FetchPartition", decode_fetch_partition_per_field, FetchPartition.decode),
+        ("RecordBatch", decode_record_batch_per_field, DefaultRecordBatch.decode),
+    ]
+    print(f"{'message':<16}{'per-field ns':>14}{'schema ns':>12}{'speedup':>10}")
+    for name, before, after in cases:
+        assert before(ByteReader(samples[name])) == after(ByteReader(samples[name]))
+        before_ns = bench(before, samples[name], args.number)
+        after_ns = bench(after, samples[name], args.number)
+        print(f"{name:<16}{before_ns:>14.0f}{after_ns:>12.0f}{before_ns / after_ns:>9.2f}x")
+
+    records_ns = bench(decode_record_batch_records, samples["RecordBatch"], args.number)
+    print(f"{'RecordBatch with records':<42}{records_ns:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
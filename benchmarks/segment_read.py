@@ -0,0 +1,85 @@
+import argparse
+import os
+import random
+import struct
+import tempfile
+import threading
+import time
+
+from app.kafka.log import Log, LogConfig, configure_segment_maps
+
+RECORD_BATCH_HEADER = struct.Struct(">qiibIhiqqqhii")
+
+
+def make_batch(record_count: int, record_size: int) -> bytes:
+    record = bytes([0, 0, 0, 0, 0]) + bytes(record_size)
+    records = b"".join(len(record).to_bytes(1) + record for _ in range(record_count))
+    batch_length = RECORD_BATCH_HEADER.size - 12 + len(records)
+    return RECORD_BATCH_HEADER.pack(
+        0, batch_length, 0, 2, 0, 0, record_count - 1, 0, 0, -1, -1, -1, record_count
+    ) + records
+
+
+def fetches_per_second(log: Log, offsets: list[int], max_size: int) -> float:
+    start = time.perf_counter()
+    for offset in offsets:
+        len(log.read(offset, max_size))
+    return len(offsets) / (time.perf_counter() - start)
+
+
+def tail_fetches_per_second(log: Log, batch: bytes, fetches: int, max_size: int) -> tuple[float, int]:
+    appended = 0
+    stop = threading.Event()
+
+    def append() -> None:
+        nonlocal appended
+        while not stop.is_set():
+            log.append([batch])
+            appended += 1
+            time.sleep(0)
+
+    appender = threading.Thread(target=append)
+    appender.start()
+    try:
+        start = time.perf_counter()
+        for _ in range(fetches):
+            len(log.read(max(log.log_end_offset - 8, 0), max_size))
+        return fetches / (time.perf_counter() - start), appended
+    finally:
+        stop.set()
+        appender.join()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batches", type=int, default=20000)
+    parser.add_argument("--record-size", type=int, default=100)
+    parser.add_argument("--fetches", type=int, default=20000)
+    parser.add_argument("--max-size", type=int, default=1024 * 1024)
+    parser.add_argument("--mmap-segments", type=int, default=16)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        log = Log(os.path.join(directory, "bench-0"), LogConfig(segment_bytes=16 * 1024 * 1024))
+        batch = make_batch(4, args.record_size)
+        for _ in range(args.batches):
+            log.append([batch])
+        offsets = [random.randrange(log.log_end_offset) for _ in range(args.fetches)]
+
+        print(f"{'case':<24}{'file fetch/s':>16}{'mmap fetch/s':>16}")
+        configure_segment_maps(0)
+        file_rate = fetches_per_second(log, offsets, args.max_size)
+        configure_segment_maps(args.mmap_segments)
+        mmap_rate = fetches_per_second(log, offsets, args.max_size)
+        print(f"{'random offsets':<24}{file_rate:>16.0f}{mmap_rate:>16.0f}")
+
+        configure_segment_maps(0)
+        file_rate, file_appends = tail_fetches_per_second(log, batch, args.fetches, args.max_size)
+        configure_segment_maps(args.mmap_segments)
+        mmap_rate, mmap_appends = tail_fetches_per_second(log, batch, args.fetches, args.max_size)
+        print(f"{'tail with appends':<24}{file_rate:>16.0f}{mmap_rate:>16.0f}")
+        print(f"{'appends during tail':<24}{file_appends:>16}{mmap_appends:>16}")
+
+
+if __name__ == "__main__":
+    main()